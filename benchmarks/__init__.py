@@ -0,0 +1 @@
+"""Offline micro-benchmarks for the data-processing hot paths (see benchmarks/run.py)."""
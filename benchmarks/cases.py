@@ -0,0 +1,94 @@
+"""
+Benchmark cases.
+
+Each case is registered with the module it needs and a setup function that
+receives that module and a synthetic records frame, does any untimed
+preparation and returns the zero-argument callable to time.
+"""
+import importlib
+import math
+from typing import Callable, Dict, Tuple
+
+import pandas as pd
+
+CASES: Dict[str, Tuple[str, Callable]] = {}
+
+
+def case(name: str, module: str):
+    def register(setup):
+        CASES[name] = (module, setup)
+        return setup
+    return register
+
+
+def load_case(name: str):
+    """Import the case's module; returns (module, setup) or raises ImportError."""
+    module, setup = CASES[name]
+    return importlib.import_module(module), setup
+
+
+def qa_capacities(n_items: int, n_qa: int = 30):
+    """(qa_id, capacity) pairs whose capacities cover `n_items`."""
+    per_qa = math.ceil(n_items / n_qa) + 1
+    return [(f"qa-{i:02d}", per_qa) for i in range(n_qa)]
+
+
+@case("generate_reports.process_records_to_report", "pages.generate_reports")
+def _(mod, df):
+    return lambda: mod.process_records_to_report(df)
+
+
+@case("bulk_update.process_records_to_report", "pages.bulk_update")
+def _(mod, df):
+    return lambda: mod.process_records_to_report(df)
+
+
+@case("generate_reports.create_summary_report", "pages.generate_reports")
+def _(mod, df):
+    from pages.bulk_update import process_records_to_report
+    report = process_records_to_report(df)
+    return lambda: mod.create_summary_report(report)
+
+
+@case("generate_reports.build_annotator_quality_cycles", "utils.quality_cycles")
+def _(mod, df):
+    return lambda: mod.build_annotator_quality_cycles(df, 120, 90)
+
+
+@case("bulk_update.sample_for_qa", "pages.bulk_update")
+def _(mod, df):
+    return lambda: mod.sample_for_qa(df, 20)
+
+
+@case("bulk_update.distribute", "pages.bulk_update")
+def _(mod, df):
+    pool = mod.flatten_task_pool(mod.sample_for_qa(df, 20))
+    qa_list = qa_capacities(len(pool))
+    return lambda: mod.distribute(list(pool), qa_list)
+
+
+@case("bulk_update.assignments_to_df", "pages.bulk_update")
+def _(mod, df):
+    selected = mod.sample_for_qa(df, 20)
+    pool = mod.flatten_task_pool(selected)
+    qa_list = qa_capacities(len(pool))
+    assignments = mod.distribute(list(pool), qa_list)
+    users_map = {qa: {"id": qa, "roles": ["qa"]} for qa, _ in qa_list}
+    return lambda: mod.assignments_to_df(assignments, selected, users_map)
+
+
+@case("data_processing.assign_questions_by_capacity", "utils.data_processing")
+def _(mod, df):
+    questions = df[["id", "status", "assignee_name", "dataset_name"]].to_dict("records")
+    capacity_df = pd.DataFrame(qa_capacities(len(questions), 100), columns=["user_id", "capacity"])
+    return lambda: mod.assign_questions_by_capacity(questions, capacity_df)
+
+
+@case("generate_reports.sanitize_for_streamlit", "pages.generate_reports")
+def _(mod, df):
+    return lambda: mod.sanitize_for_streamlit(df)
+
+
+@case("data_processing.csv_to_json_zip", "utils.data_processing")
+def _(mod, df):
+    return lambda: mod.csv_to_json_zip(df)
@@ -0,0 +1,180 @@
+"""
+Run the data-processing micro-benchmarks on synthetic record frames.
+
+    python -m benchmarks.run                              # 10k and 100k rows, all cases
+    python -m benchmarks.run --sizes 10k,100k,1m,5m --max-seconds 120
+    python -m benchmarks.run --only sample_for_qa --save-baseline
+    python -m benchmarks.run --baseline .cache/benchmarks/baseline.json --fail-on-regression
+
+Time is the best of `--repeat` runs (time.perf_counter); peak memory is the
+tracemalloc peak of one extra run. A case that takes longer than
+`--max-seconds` at one size is not run at the larger sizes.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.cases import CASES, load_case
+from devtools.synthetic import synthetic_records
+
+CACHE_DIR = os.path.join(".cache", "benchmarks")
+DEFAULT_BASELINE = os.path.join(CACHE_DIR, "baseline.json")
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def records_frame(n_rows: int, seed: int) -> pd.DataFrame:
+    """Synthetic records, cached as parquet since the large sizes take a while to generate."""
+    path = os.path.join(CACHE_DIR, f"records_{n_rows}_{seed}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    df = synthetic_records(n_rows, seed=seed)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df.to_parquet(path, index=False)
+    return df
+
+
+def measure(func, repeat: int, memory: bool):
+    times = []
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), sum(times) / len(times), peak
+
+
+def run(sizes, names, repeat, memory, max_seconds, seed):
+    results = []
+    too_slow = set()
+    for n_rows in sizes:
+        print(f"--- {n_rows:,} rows ---", file=sys.stderr)
+        df = records_frame(n_rows, seed)
+        for name in names:
+            row = {"case": name, "rows": n_rows}
+            if name in too_slow:
+                results.append({**row, "status": f"skipped (> {max_seconds:g}s at a smaller size)"})
+                continue
+            try:
+                module, setup = load_case(name)
+            except ImportError as e:
+                results.append({**row, "status": f"unavailable ({e})"})
+                continue
+            try:
+                func = setup(module, df)
+                best, mean, peak = measure(func, repeat, memory)
+            except Exception as e:
+                results.append({**row, "status": f"error ({type(e).__name__}: {e})"})
+                continue
+            results.append({
+                **row,
+                "status": "ok",
+                "seconds": best,
+                "mean_seconds": mean,
+                "peak_mb": peak / 1e6 if peak is not None else None,
+            })
+            print(f"{name:<55} {best:10.4f}s", file=sys.stderr)
+            if max_seconds and best > max_seconds:
+                too_slow.add(name)
+        del df
+        gc.collect()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Add ratios against the baseline; returns the rows that regressed beyond `tolerance`."""
+    base = {(r["case"], r["rows"]): r for r in baseline.get("results", []) if r.get("status") == "ok"}
+    regressions = []
+    for r in results:
+        b = base.get((r["case"], r["rows"]))
+        if r.get("status") != "ok" or b is None:
+            continue
+        r["time_ratio"] = r["seconds"] / b["seconds"] if b["seconds"] else None
+        if r.get("peak_mb") is not None and b.get("peak_mb"):
+            r["mem_ratio"] = r["peak_mb"] / b["peak_mb"]
+        if (r["time_ratio"] or 0) > 1 + tolerance or (r.get("mem_ratio") or 0) > 1 + tolerance:
+            regressions.append(r)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data-processing hot paths on synthetic data.")
+    parser.add_argument("--sizes", default="10k,100k", help="comma-separated row counts, e.g. 10k,100k,1m,5m")
+    parser.add_argument("--only", default="", help="comma-separated substrings of case names to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--max-seconds", type=float, default=60.0, help="stop scaling a case once a run exceeds this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown / memory growth vs baseline")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", default="", help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    # The pages call st.* outside a script run; keep Streamlit's bare-mode warnings out of the report
+    import streamlit  # noqa: F401  (configures its loggers first)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    filters = [f.strip() for f in args.only.split(",") if f.strip()]
+    names = [n for n in CASES if not filters or any(f in n for f in filters)]
+
+    results = run(sizes, names, args.repeat, not args.no_memory, args.max_seconds, args.seed)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    table = pd.DataFrame(results)
+    with pd.option_context("display.max_rows", None, "display.width", 200, "display.max_colwidth", 60):
+        print(table.round(4).to_string(index=False))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} of {args.baseline}:")
+        for r in regressions:
+            print(f"  {r['case']} @ {r['rows']:,} rows: time x{r['time_ratio']:.2f}, memory x{r.get('mem_ratio') or 1:.2f}")
+
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -33,3 +33,95 @@ USABLE_COLUMNS = get_list("USABLE_COLUMNS", [
 ])
 
 DUMMY_USERS = get_list("DUMMY_USERS", ['anno1','anno2','anno3','anno4'])
+
+# HTTP client (shared, pooled session used by utils/api.py and utils/auth.py)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+
+# Concurrent page fetching
+# Upper bound per call; the adaptive limiter below decides how many actually run
+PAGE_FETCH_WORKERS = int(os.getenv("PAGE_FETCH_WORKERS", "16"))
+
+# Local record store (incremental sync of dataset records)
+RECORD_STORE_PATH = os.getenv("RECORD_STORE_PATH", ".cache/records.sqlite3")
+# Longest wait for a dataset sync another session is running before giving up on it
+SYNC_WAIT_SECONDS = float(os.getenv("SYNC_WAIT_SECONDS", "600"))
+# Staged pages of a sync that has staged nothing for this long are treated as abandoned
+STAGING_MAX_AGE_SECONDS = float(os.getenv("STAGING_MAX_AGE_SECONDS", "86400"))
+# Datasets that can no longer change at all (QA flags still move after "completed")
+CLOSED_DATASET_STATUS = get_list("CLOSED_DATASET_STATUS", ['closed', 'archived'])
+
+# Process-wide cache for reference data (users, roles, projects, pipeline runs, schemas)
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+REFERENCE_CACHE_MAXSIZE = int(os.getenv("REFERENCE_CACHE_MAXSIZE", "256"))
+
+# Client-side rate limiting and adaptive (AIMD) concurrency for the DOT API
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "20"))  # requests per second
+API_RATE_BURST = int(os.getenv("API_RATE_BURST", "40"))
+API_CONCURRENCY_INITIAL = int(os.getenv("API_CONCURRENCY_INITIAL", "4"))
+API_CONCURRENCY_MIN = int(os.getenv("API_CONCURRENCY_MIN", "1"))
+API_CONCURRENCY_MAX = int(os.getenv("API_CONCURRENCY_MAX", "32"))
+API_LATENCY_TARGET = float(os.getenv("API_LATENCY_TARGET", "2.0"))  # p95 seconds
+
+# Bulk QA update executor
+BULK_UPDATE_CHUNK_SIZE = int(os.getenv("BULK_UPDATE_CHUNK_SIZE", "500"))
+BULK_UPDATE_WORKERS = int(os.getenv("BULK_UPDATE_WORKERS", "4"))
+BULK_UPDATE_ATTEMPTS = int(os.getenv("BULK_UPDATE_ATTEMPTS", "3"))
+
+# HTTP instrumentation (bounded in-memory request log)
+HTTP_METRICS_MAXLEN = int(os.getenv("HTTP_METRICS_MAXLEN", "20000"))
+
+# Zip building / uploads
+ZIP_CHUNK_ROWS = int(os.getenv("ZIP_CHUNK_ROWS", "20000"))
+ZIP_SPOOL_MAX_BYTES = int(os.getenv("ZIP_SPOOL_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Sharded uploads (compressed and uploaded from thread pools)
+UPLOAD_SHARD_ROWS = int(os.getenv("UPLOAD_SHARD_ROWS", "100000"))
+UPLOAD_COMPRESS_WORKERS = int(os.getenv("UPLOAD_COMPRESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_ATTEMPTS = int(os.getenv("UPLOAD_ATTEMPTS", "3"))
+UPLOAD_MANIFEST_DIR = os.getenv("UPLOAD_MANIFEST_DIR", ".cache/uploads")
+
+# Decoded dataset frames kept in memory across sessions (keyed by record-store version)
+FRAME_CACHE_MAX_MB = int(os.getenv("FRAME_CACHE_MAX_MB", "1024"))
+
+# Speculative prefetch of project listings and records. Warming a user's recent
+# projects on every render of the reports page is opt-in; projects selected in
+# the page are still loaded as soon as they are picked.
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+PREFETCH_COOLDOWN = float(os.getenv("PREFETCH_COOLDOWN", "1800"))  # seconds before a project is warmed again
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_PAGE_WORKERS = int(os.getenv("PREFETCH_PAGE_WORKERS", "8"))
+PREFETCH_RECENT_PROJECTS = int(os.getenv("PREFETCH_RECENT_PROJECTS", "3"))
+PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", "120"))
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "60"))
+RECENT_PROJECTS_PATH = os.getenv("RECENT_PROJECTS_PATH", ".cache/recent_projects.json")
+
+# Background refresh of hot projects / datasets (runs inside the Streamlit server process).
+# Opt-in, and only with a service token (ACCESS_TOKEN); session tokens are never used.
+REFRESH_ENABLED = os.getenv("REFRESH_ENABLED", "false").lower() in ("1", "true", "yes")
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "600"))  # seconds between refresh cycles
+HOT_PROJECTS = get_list("HOT_PROJECTS", [])
+HOT_DATASETS = get_list("HOT_DATASETS", [])
+REFRESH_RECENT_PROJECTS = int(os.getenv("REFRESH_RECENT_PROJECTS", "3"))
+
+# Annotator QA quality cycles (a cycle closes once it holds this many QA'd items)
+CYCLE_MIN_QA_SAMPLES = int(os.getenv("CYCLE_MIN_QA_SAMPLES", "120"))
+CYCLE_MIN_PASS_COUNT = int(os.getenv("CYCLE_MIN_PASS_COUNT", "90"))
+# Default grid offered by the threshold sweep view: "start:stop:step"
+CYCLE_SWEEP_QA_RANGE = os.getenv("CYCLE_SWEEP_QA_RANGE", "30:300:30")
+CYCLE_SWEEP_PASS_RANGE = os.getenv("CYCLE_SWEEP_PASS_RANGE", "20:200:10")
+
+# Materialized report counts (updated from sync deltas), bounded by records tracked
+REPORT_COUNTS_MAX_ROWS = int(os.getenv("REPORT_COUNTS_MAX_ROWS", "20000000"))
+
+# Memoized report computations (report tables, cycles, exports) across reruns
+REPORT_MEMO_MAX_MB = int(os.getenv("REPORT_MEMO_MAX_MB", "512"))
+
+# Decoded record frames: short text columns with at most this share of distinct
+# values (per row) are dictionary-encoded; long free-text fields never are
+RECORD_CATEGORY_MAX_RATIO = float(os.getenv("RECORD_CATEGORY_MAX_RATIO", "0.5"))
@@ -0,0 +1 @@
+"""Offline development tools: a synthetic data generator and a local stand-in for the DOT API."""
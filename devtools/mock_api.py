@@ -0,0 +1,274 @@
+"""
+Local stand-in for the DOT API, backed by a SyntheticWorld.
+
+Serves the endpoints utils/ talks to, with configurable latency, page size
+and injected errors, so fetch / bulk-update changes can be measured without
+the real backend:
+
+    python -m devtools.mock_api --port 8765 --rows 20000 --latency 0.05 --error-rate 0.02
+    API_BASE_URL=http://127.0.0.1:8765 ACCESS_TOKEN=mock streamlit run main.py
+
+Any bearer token is accepted; /auth/token hands one out for any user.
+"""
+import argparse
+import io
+import json
+import random
+import re
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from devtools.synthetic import SyntheticWorld
+
+API = "/api/v1"
+
+
+@dataclass
+class MockConfig:
+    page_size: int = 1000
+    latency: float = 0.0             # base seconds added to every response
+    latency_jitter: float = 0.0      # extra uniform(0, jitter) seconds
+    latency_per_row: float = 0.0     # extra seconds per record returned by /data
+    error_rate: float = 0.0          # share of requests answered with an injected error
+    error_statuses: Tuple[int, ...] = (500, 502, 503, 429)
+    retry_after: float = 1.0         # Retry-After sent with injected 429/503
+    seed: int = 0
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+class MockDotServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, world: SyntheticWorld, config: MockConfig):
+        super().__init__(address, MockDotHandler)
+        self.world = world
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str):
+        with self.lock:
+            self.config.stats[key] = self.config.stats.get(key, 0) + 1
+
+    def draw(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+
+class MockDotHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API behind its proxy
+    server: MockDotServer
+
+    ROUTES = [
+        ("POST", r"/auth/token", "auth_token"),
+        ("GET", r"/users", "users"),
+        ("GET", r"/projects", "projects"),
+        ("GET", r"/projects/(?P<project_id>[^/]+)", "project"),
+        ("GET", r"/data_v2/pipeline", "pipeline_runs"),
+        ("GET", r"/data_v2/pipeline/(?P<run_id>[^/]+)", "pipeline_run"),
+        ("GET", r"/data_v2/pipeline/(?P<run_id>[^/]+)/schema", "schema"),
+        ("GET", r"/data_v2/pipeline/(?P<run_id>[^/]+)/data", "data"),
+        ("POST", r"/data_v2/pipeline/(?P<run_id>[^/]+)/bulk-update", "bulk_update"),
+        ("POST", r"/data_v2/upload", "upload"),
+    ]
+
+    def log_message(self, *args):
+        pass
+
+    # --- plumbing ---
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+
+        for route_method, pattern, name in self.ROUTES:
+            match = re.fullmatch(API + pattern, url.path)
+            if match and route_method == method:
+                break
+        else:
+            return self._json(404, {"detail": "Not Found"})
+
+        config = self.server.config
+        self.server.count(name)
+        time.sleep(config.latency + (random.uniform(0, config.latency_jitter) if config.latency_jitter else 0))
+
+        if config.error_rate and self.server.draw() < config.error_rate:
+            status = config.error_statuses[int(self.server.draw() * len(config.error_statuses))]
+            self.server.count(f"error_{status}")
+            headers = {"Retry-After": f"{config.retry_after:g}"} if status in (429, 503) else {}
+            return self._json(status, {"detail": "Injected error"}, headers)
+
+        if name != "auth_token" and not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._json(401, {"detail": "Not authenticated"})
+        try:
+            getattr(self, f"handle_{name}")(**match.groupdict())
+        except KeyError as e:
+            self._json(404, {"detail": f"Not found: {e}"})
+
+    def _json(self, status: int, payload, headers: Dict = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    # --- endpoints ---
+
+    def handle_auth_token(self):
+        form = {k: v[-1] for k, v in parse_qs(self.body.decode()).items()}
+        if not form.get("username") or not form.get("password"):
+            return self._json(401, {"detail": "Incorrect username or password"})
+        self._json(200, {"access_token": f"mock-{form['username']}", "token_type": "bearer"})
+
+    def handle_users(self):
+        self._json(200, self.server.world.users)
+
+    def handle_projects(self):
+        world = self.server.world
+        self._json(200, {"projects": [world.project_summary(p) for p in world.projects]})
+
+    def handle_project(self, project_id):
+        world = self.server.world
+        self._json(200, world.project_detail(world.project_by_id[project_id]))
+
+    def handle_pipeline_runs(self):
+        world = self.server.world
+        self._json(200, [world.public(d) for d in world.datasets])
+
+    def handle_pipeline_run(self, run_id):
+        world = self.server.world
+        self._json(200, world.public(world.by_id[run_id]))
+
+    def handle_schema(self, run_id):
+        world = self.server.world
+        sample = world.records(run_id, 0, 1)
+        fields = sample[0] if sample else {}
+        self._json(200, {"fields": [{"name": k, "type": type(v).__name__ if v is not None else "null"} for k, v in fields.items()]})
+
+    def handle_data(self, run_id):
+        world, config = self.server.world, self.server.config
+        dataset = world.by_id[run_id]
+        page_size = max(1, int(self.query.get("page_size", config.page_size)))
+        page = max(1, int(self.query.get("page", 1)))
+        total_rows = dataset["total_rows"]
+        total_pages = max(1, -(-total_rows // page_size))
+        records = world.records(run_id, (page - 1) * page_size, page * page_size)
+        if config.latency_per_row:
+            time.sleep(config.latency_per_row * len(records))
+        self._json(200, {
+            "data": records,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "total_rows": total_rows,
+        })
+
+    def handle_bulk_update(self, run_id):
+        payload = json.loads(self.body or b"{}")
+        updated = self.server.world.bulk_update(
+            run_id, payload.get("questions", []), payload.get("new_reviewer"), payload.get("new_status")
+        )
+        self._json(200, {"updated": updated})
+
+    def handle_upload(self):
+        message = BytesParser().parsebytes(
+            b"Content-Type: " + self.headers.get("Content-Type", "").encode() + b"\r\n\r\n" + self.body
+        )
+        if not message.is_multipart():
+            return self._json(422, {"detail": "Expected multipart/form-data"})
+        parts = {p.get_param("name", header="content-disposition"): p.get_payload(decode=True) for p in message.get_payload()}
+        try:
+            with zipfile.ZipFile(io.BytesIO(parts.get("file") or b"")) as z:
+                rows = len(json.loads(z.read("data.json")))
+        except (zipfile.BadZipFile, KeyError, ValueError) as e:
+            return self._json(422, {"detail": f"Invalid upload: {e}"})
+        upload = {
+            "run_id": (parts.get("run_id") or b"").decode(),
+            "run_name": (parts.get("run_name") or b"").decode(),
+            "rows": rows,
+            "bytes": len(parts["file"]),
+        }
+        with self.server.lock:
+            self.server.world.uploads.append(upload)
+        self._json(200, upload)
+
+
+def serve(world: SyntheticWorld = None, config: MockConfig = None, host: str = "127.0.0.1", port: int = 0) -> MockDotServer:
+    """Start a mock server in a daemon thread and return it (see `.base_url`, `.shutdown()`)."""
+    server = MockDotServer((host, port), world or SyntheticWorld(), config or MockConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the DOT API with synthetic data.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--datasets-per-project", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=10_000, help="mean rows per dataset")
+    parser.add_argument("--annotators", type=int, default=300)
+    parser.add_argument("--qa-users", type=int, default=30)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--latency-per-row", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-statuses", default="500,502,503,429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    world = SyntheticWorld(
+        seed=args.seed,
+        n_projects=args.projects,
+        datasets_per_project=args.datasets_per_project,
+        rows_per_dataset=args.rows,
+        n_annotators=args.annotators,
+        n_qa=args.qa_users,
+    )
+    config = MockConfig(
+        page_size=args.page_size,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        latency_per_row=args.latency_per_row,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(",") if s),
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    server = MockDotServer((args.host, args.port), world, config)
+    print(f"Mock DOT API on {server.base_url}: {len(world.projects)} projects, "
+          f"{len(world.datasets)} datasets, {world.total_rows:,} rows, {len(world.users)} users")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
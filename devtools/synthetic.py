@@ -0,0 +1,301 @@
+"""
+Seeded, lazily generated stand-in for DOT data.
+
+A SyntheticWorld describes users, projects and datasets up front (cheap) and
+generates records only when a range of rows is asked for. Rows are produced
+in fixed blocks from a generator seeded by (seed, dataset, block), so the
+same row always has the same content regardless of page size or request
+order, and millions of rows never have to exist at once.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from config import COMPLETED_STATUS, INCOMPLETE_STATUS, QA_DONE_STATUS, QA_STATUS, USABLE_COLUMNS, PREFIX, SFT_ROUND
+
+BLOCK_ROWS = 1024
+DOMAINS = ["general", "finance", "health", "legal", "education", "travel", "food", "sports", "science", "culture"]
+TASKS = ["qa", "rewrite", "summarization", "translation", "classification", "reasoning"]
+WORDS = ("the of and to in is for on with as by this that from at are be or an it not which can "
+         "data model answer question user system should would could because however therefore").split()
+
+
+def _uuid(rng: np.random.Generator) -> str:
+    return str(uuid.UUID(bytes=rng.bytes(16), version=4))
+
+
+class SyntheticWorld:
+    """Deterministic users, projects, datasets and (lazily) records for a given seed."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        n_projects: int = 5,
+        datasets_per_project: int = 20,
+        rows_per_dataset: int = 10_000,
+        n_annotators: int = 300,
+        n_qa: int = 30,
+        annotators_per_dataset: int = 25,
+        start_date: str = "2025-01-06",
+    ):
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._blocks = OrderedDict()
+        self.overrides: Dict[int, Dict[int, Dict]] = {}
+        self.uploads: List[Dict] = []
+
+        # --- users ---
+        self.annotators = [{"id": _uuid(rng), "username": f"anno{i + 1:03d}"} for i in range(n_annotators)]
+        self.qa_users = [{"id": _uuid(rng), "username": f"qa{i + 1:02d}"} for i in range(n_qa)]
+        self.users = (
+            [{**u, "email": f"{u['username']}@example.com", "roles": [{"name": "annotator"}]} for u in self.annotators]
+            + [{**u, "email": f"{u['username']}@example.com", "roles": [{"name": "qa"}]} for u in self.qa_users]
+            + [{"id": _uuid(rng), "username": "admin", "email": "admin@example.com", "roles": [{"name": "admin"}]}]
+        )
+        # Per-annotator pass probability and productivity
+        self.skill = np.clip(rng.beta(8, 2, n_annotators), 0.2, 0.995)
+        self.activity = rng.zipf(1.6, n_annotators).clip(1, 50).astype(float)
+
+        # A fixed bank of sentences keeps text generation cheap per row
+        words = np.array(WORDS, dtype=object)
+        self._sentences = np.array(
+            [" ".join(words[rng.integers(0, len(words), k)]) for k in rng.integers(6, 40, 4096)], dtype=object
+        )
+
+        # --- projects and datasets ---
+        start = datetime.fromisoformat(start_date).replace(tzinfo=timezone.utc)
+        self.projects, self.datasets = [], []
+        for p in range(n_projects):
+            project = {"id": _uuid(rng), "name": f"Project {p + 1:02d}", "datasets": []}
+            for d in range(datasets_per_project):
+                index = len(self.datasets)
+                day = start + timedelta(days=7 * d + p)
+                total_rows = max(1, int(rows_per_dataset * rng.lognormal(0, 0.4)))
+                # Older batches are further along
+                progress = float(np.clip(0.35 + 0.6 * (d + 1) / datasets_per_project + rng.normal(0, 0.05), 0.05, 1.0))
+                pool = rng.choice(n_annotators, size=min(annotators_per_dataset, n_annotators), replace=False)
+                dataset = {
+                    "id": _uuid(rng),
+                    "run_id": f"{PREFIX}-{index + 1:05d}",
+                    "run_name": f"{PREFIX}_p{p + 1:02d}_batch{d + 1:03d}_{day:%Y%m%d}",
+                    "status": "completed" if progress >= 0.99 else "in_progress",
+                    "created_at": day.isoformat(),
+                    "updated_at": (day + timedelta(days=3)).isoformat(),
+                    "total_rows": total_rows,
+                    "project_id": project["id"],
+                    "_index": index,
+                    "_progress": progress,
+                    "_pool": pool,
+                    "_pool_weights": self.activity[pool] / self.activity[pool].sum(),
+                }
+                self.datasets.append(dataset)
+                project["datasets"].append(dataset)
+            self.projects.append(project)
+        self.by_id = {d["id"]: d for d in self.datasets}
+        self.project_by_id = {p["id"]: p for p in self.projects}
+
+    # --- public views (what the API returns) ---
+
+    @staticmethod
+    def public(dataset: Dict) -> Dict:
+        return {k: v for k, v in dataset.items() if not k.startswith("_")}
+
+    def project_summary(self, project: Dict) -> Dict:
+        return {"id": project["id"], "name": project["name"], "dataset_count": len(project["datasets"])}
+
+    def project_detail(self, project: Dict) -> Dict:
+        return {"id": project["id"], "name": project["name"], "datasets": [self.public(d) for d in project["datasets"]]}
+
+    @property
+    def total_rows(self) -> int:
+        return sum(d["total_rows"] for d in self.datasets)
+
+    # --- record ids ---
+
+    @staticmethod
+    def record_id(dataset: Dict, row: int) -> str:
+        """Record ids are UUID-shaped and encode their row, so updates can find it again."""
+        return f"{dataset['id'][:8]}-0000-0000-0000-{row:012x}"
+
+    @staticmethod
+    def row_of(record_id: str) -> int:
+        return int(str(record_id).replace("-", "")[8:], 16)
+
+    # --- record generation ---
+
+    def _block(self, dataset: Dict, block: int) -> Dict[str, np.ndarray]:
+        key = (dataset["_index"], block)
+        with self._lock:
+            if key in self._blocks:
+                self._blocks.move_to_end(key)
+                return self._blocks[key]
+        columns = self._generate_block(dataset, block)
+        with self._lock:
+            self._blocks[key] = columns
+            while len(self._blocks) > 256:
+                self._blocks.popitem(last=False)
+        return columns
+
+    def _generate_block(self, dataset: Dict, block: int) -> Dict[str, np.ndarray]:
+        rng = np.random.default_rng([self.seed, dataset["_index"], block])
+        first = block * BLOCK_ROWS
+        n = min(BLOCK_ROWS, dataset["total_rows"] - first)
+        rows = np.arange(first, first + n)
+
+        done = rng.random(n) < dataset["_progress"]
+        qa_done = [s for s in COMPLETED_STATUS if s in QA_DONE_STATUS]
+        qa_pending = [s for s in COMPLETED_STATUS if s in QA_STATUS and s not in QA_DONE_STATUS]
+        annotated = [s for s in COMPLETED_STATUS if s not in QA_STATUS]
+        stage = rng.random(n)
+        status = np.where(
+            done,
+            np.where(stage < 0.55, (qa_done or COMPLETED_STATUS)[0],
+                     np.where(stage < 0.8, (qa_pending or COMPLETED_STATUS)[0], (annotated or COMPLETED_STATUS)[0])),
+            rng.choice(INCOMPLETE_STATUS, n, p=None),
+        ).astype(object)
+
+        slot = rng.choice(len(dataset["_pool"]), n, p=dataset["_pool_weights"])
+        annotator = dataset["_pool"][slot]
+        assignee = np.array([self.annotators[a]["id"] for a in annotator], dtype=object)
+        unassigned = (status == "not_started") & (rng.random(n) < 0.3)
+        assignee[unassigned] = None
+
+        in_qa = np.isin(status, QA_STATUS)
+        reviewer = np.array([q["id"] for q in self.qa_users], dtype=object)[rng.integers(0, len(self.qa_users), n)]
+        reviewer[~in_qa] = None
+
+        passed = rng.random(n) < self.skill[annotator]
+        qa_flag = np.where(passed, "pass", "fail").astype(object)
+        qa_flag[~np.isin(status, QA_DONE_STATUS)] = None
+
+        domain = np.array(DOMAINS, dtype=object)[rng.integers(0, len(DOMAINS), n)]
+        task = np.array(TASKS, dtype=object)[rng.integers(0, len(TASKS), n)]
+        text = self._sentences[rng.integers(0, len(self._sentences), n)]
+
+        columns = {
+            "id": np.array([f"{dataset['id'][:8]}-0000-0000-0000-{r:012x}" for r in rows], dtype=object),
+            "pipeline_run_id": np.full(n, dataset["id"], dtype=object),
+            "uuid": np.array([f"{PREFIX}{dataset['_index']:03d}{r:07d}" for r in rows], dtype=object),
+            "original_id": np.array([f"{PREFIX}{r + 1:05d}" for r in rows], dtype=object),
+            "sft_round": np.full(n, SFT_ROUND, dtype=object),
+            "package_id": np.array([f"PKG{r // 200:04d}" for r in rows], dtype=object),
+            "assignee": assignee,
+            "reviewer": reviewer,
+            "status": status,
+            "qa_flag": qa_flag,
+            "qa_feedback": np.where(qa_flag == "fail", "needs rework", None).astype(object),
+            "task": task,
+            "domain": domain,
+            "question": np.array([f"Q{r}: {t}?" for r, t in zip(rows, text)], dtype=object),
+            "answer": np.array([f"A{r}: {t}." for r, t in zip(rows, text)], dtype=object),
+            "reason": np.full(n, "", dtype=object),
+            "metadata": np.full(n, "{}", dtype=object),
+            "corrected_question": np.full(n, None, dtype=object),
+            "corrected_answer": np.full(n, None, dtype=object),
+        }
+        for column in USABLE_COLUMNS:
+            if column.startswith("[fail]"):
+                columns[column] = rng.random(n) < 0.05
+            elif column == "prompt_status":
+                columns[column] = np.array(["ok", "edited", "rejected"], dtype=object)[rng.choice(3, n, p=[0.8, 0.15, 0.05])]
+            elif column == "rewrite_degree":
+                columns[column] = np.array(["none", "minor", "major"], dtype=object)[rng.choice(3, n, p=[0.6, 0.3, 0.1])]
+            else:
+                columns[column] = np.where(done, "looks fine", "").astype(object)
+        return columns
+
+    def columns(self, dataset_id: str, start: int, stop: int) -> Dict[str, np.ndarray]:
+        """Columns for rows [start, stop) of a dataset, with bulk updates applied."""
+        dataset = self.by_id[dataset_id]
+        stop = min(stop, dataset["total_rows"])
+        if start >= stop:
+            return {}
+        parts = []
+        for block in range(start // BLOCK_ROWS, (stop - 1) // BLOCK_ROWS + 1):
+            cols = self._block(dataset, block)
+            lo = max(start - block * BLOCK_ROWS, 0)
+            hi = min(stop - block * BLOCK_ROWS, BLOCK_ROWS)
+            parts.append({k: v[lo:hi] for k, v in cols.items()})
+        out = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+        overrides = self.overrides.get(dataset["_index"])
+        if overrides:
+            out = {k: v.copy() for k, v in out.items()}
+            for row, changes in overrides.items():
+                if start <= row < stop:
+                    for k, v in changes.items():
+                        out[k][row - start] = v
+        return out
+
+    def records(self, dataset_id: str, start: int, stop: int) -> List[Dict]:
+        """Rows [start, stop) of a dataset as JSON-ready dicts."""
+        cols = self.columns(dataset_id, start, stop)
+        if not cols:
+            return []
+        keys = list(cols)
+        values = [v.tolist() for v in cols.values()]
+        return [dict(zip(keys, row)) for row in zip(*values)]
+
+    def frame(self, dataset_ids: Iterable[str] = None) -> pd.DataFrame:
+        """
+        All records of the given datasets (default: all) as one frame, shaped
+        like get_dataset_records' output (dataset_id, dataset_name,
+        assignee_name, project_id, project_name added).
+        """
+        names = {u["id"]: u["username"] for u in self.users}
+        frames = []
+        for ds_id in dataset_ids or [d["id"] for d in self.datasets]:
+            dataset = self.by_id[ds_id]
+            df = pd.DataFrame(self.columns(ds_id, 0, dataset["total_rows"]))
+            df["dataset_id"] = ds_id
+            df["dataset_name"] = dataset["run_name"]
+            df["assignee_name"] = df["assignee"].map(names).fillna("Unknown")
+            df["project_id"] = dataset["project_id"]
+            df["project_name"] = self.project_by_id[dataset["project_id"]]["name"]
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    # --- mutations ---
+
+    def bulk_update(self, dataset_id: str, question_ids: Iterable[str], new_reviewer: str = None, new_status: str = None) -> int:
+        dataset = self.by_id[dataset_id]
+        changes = {}
+        if new_reviewer is not None:
+            changes["reviewer"] = new_reviewer
+        if new_status is not None:
+            changes["status"] = new_status
+        updated = 0
+        with self._lock:
+            overrides = self.overrides.setdefault(dataset["_index"], {})
+            for qid in question_ids:
+                try:
+                    row = self.row_of(qid)
+                except ValueError:
+                    continue
+                if 0 <= row < dataset["total_rows"] and self.record_id(dataset, row) == str(qid):
+                    overrides.setdefault(row, {}).update(changes)
+                    updated += 1
+            if updated:
+                dataset["updated_at"] = datetime.now(timezone.utc).isoformat()
+        return updated
+
+
+def synthetic_records(n_rows: int, seed: int = 0, rows_per_dataset: int = 5000, n_annotators: int = 300, n_projects: int = 4) -> pd.DataFrame:
+    """A records frame of about `n_rows` rows, spread over projects, datasets and annotators."""
+    n_datasets = max(1, round(n_rows / rows_per_dataset))
+    per_project = max(1, -(-n_datasets // n_projects))
+    world = SyntheticWorld(
+        seed=seed,
+        n_projects=min(n_projects, n_datasets),
+        datasets_per_project=per_project,
+        rows_per_dataset=rows_per_dataset,
+        n_annotators=n_annotators,
+    )
+    df = world.frame()
+    return df.iloc[:n_rows] if len(df) > n_rows else df
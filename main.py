@@ -1,5 +1,6 @@
+import time
 import streamlit as st
-from config import ACCESS_TOKEN
+from config import ACCESS_TOKEN, REFRESH_ENABLED
 from pages.dashboard import dashboard_page
 from pages.upload_data import upload_data_page
 from pages.query_data import query_data_page
@@ -8,6 +9,9 @@ from pages.bulk_update import bulk_update_page
 from pages.recycle_questions import recycle_page
 from utils.auth import login
 from utils.state import init_session_state
+from utils.cache import invalidate_reference_cache
+from utils.visualizations import http_metrics_panel
+from utils.refresh import start_background_refresh
 
 # init_session_state()
 
@@ -28,6 +32,11 @@ def main():
                 st.rerun()
         return
 
+    # Keep hot projects warm in the background (one worker per server process,
+    # service token only -- never the session's)
+    if REFRESH_ENABLED:
+        refresher = start_background_refresh()
+
     # ✅ Continue to the rest of your app
     st.sidebar.title("Navigation")
     page = st.sidebar.selectbox("Select Page", 
@@ -38,9 +47,21 @@ def main():
                                  "Bulk Assign QA", 
                                 #  "Recycle Questions"
                                  ])
+    if st.sidebar.button("Refresh cached data", help="Reload users, projects and pipeline runs from the API"):
+        invalidate_reference_cache()
     if st.sidebar.button("Logout"):
         st.session_state.clear()
         st.rerun()
+    if st.sidebar.checkbox("Show API request metrics", value=False):
+        http_metrics_panel()
+    if REFRESH_ENABLED:
+        snapshot = refresher.snapshot()
+        if snapshot.published_at:
+            age = int((time.time() - snapshot.published_at) // 60)
+            st.sidebar.caption(
+                f"🔄 Background refresh: {len(snapshot.versions)} hot datasets, {age} min ago"
+                + (f", {len(snapshot.errors)} error(s)" if snapshot.errors else "")
+            )
 
     if page == "Dashboard":
         dashboard_page()
@@ -7,10 +7,14 @@ from config import COMPLETED_STATUS, QA_DONE_STATUS
 from utils.api import (
     get_pipeline_runs,
     get_dataset_records,
-    bulk_update_qa,
     get_users_with_roles,
 )
-from utils.data_processing import get_performance_tier
+from utils.record_store import get_record_store
+from utils.cache import invalidate_reference_cache
+from utils.bulk import plan_bulk_updates, run_bulk_updates
+from utils.report_engine import compute_report, compute_report_from_counts, QA_REPORT_METRICS
+from utils.report_store import report_counts
+from utils.memo import memoize
 
 # =====================================================
 #  HELPERS
@@ -44,7 +48,7 @@ def sample_for_qa(df, rate, seed=42):
     result = {}
     rng = random.Random(seed)
     df = df[df['assignee_name']!="Unknown"]
-    for (user, ds), group in df.groupby(["assignee_name", "dataset_name"]):
+    for (user, ds), group in df.groupby(["assignee_name", "dataset_name"], observed=True):
         completed = group[group["status"].str.lower().isin(COMPLETED_STATUS)]
         completed = completed[~completed["status"].str.lower().isin(QA_DONE_STATUS)]
         # completed = group[~group["assignee_name"].str.lower().isin(["unknown"])]
@@ -101,42 +105,22 @@ def distribute(pool, qa_list):
     return assignments
 
 
+def build_qa_report(df):
+    keys = ["assignee_name", "dataset_name"]
+    labels = {"assignee_name": "Unassigned", "dataset_name": "Unknown Dataset"}
+    counts = report_counts(df, st.session_state.get("user_data", {}))
+    if counts is not None:
+        return compute_report_from_counts(counts, keys, QA_REPORT_METRICS, labels=labels)
+    return compute_report(df, keys, QA_REPORT_METRICS, labels=labels)
+
+
 def process_records_to_report(df):
-    report_rows = []
-    for (assignee_name, dataset_name), group in df.groupby(["assignee_name", "dataset_name"]):
-        total = len(group)
-        completed = len(group[group["status"].str.lower().isin(COMPLETED_STATUS)])
-        comp_rate = round((completed / total) * 100, 2) if total else 0
-
-        ready_for_qa = len(group[group["status"].str.lower() == "ready_for_qa"])
-        selected_qa_rate = round((ready_for_qa / completed) * 100, 2) if completed else 0
-
-        qa_completed = len(group[group["status"].str.lower().isin(QA_DONE_STATUS)])
-        qa_comp_rate = round((qa_completed / completed) * 100, 2) if completed else 0
-
-        qa_p = len(group[group["qa_flag"].str.lower() == "pass"])
-        qa_f = len(group[group["qa_flag"].str.lower() == "fail"])
-        qa_pass_rate = round((qa_p / qa_completed) * 100, 2) if qa_completed else 0
-
-        report_rows.append({
-            "assignee_name": assignee_name or "Unassigned",
-            "dataset_name": dataset_name or "Unknown Dataset",
-            "total_assigned": total,
-            "total_completed": completed,
-            "comp_rate": comp_rate,
-            "ready_for_qa": ready_for_qa,
-            "selected_qa_rate": selected_qa_rate,
-            "total_qa": qa_completed,
-            "qa_comp_rate": qa_comp_rate,
-            "qa_pass": qa_p,
-            "qa_fail": qa_f,
-            "qa_pass_rate": qa_pass_rate,
-            "performance_tier": get_performance_tier(qa_pass_rate)
-        })
-    if not report_rows:
+    # Reused across reruns while the fetched records are unchanged
+    report = memoize(df, "qa_report", lambda: build_qa_report(df), user_data=st.session_state.get("user_data", {}))
+    if report.empty:
         st.warning("No valid data found.")
         return pd.DataFrame()
-    return pd.DataFrame(report_rows)
+    return report
 
 
 def assignments_to_df(assignments, selected, users_map):
@@ -204,9 +188,10 @@ def bulk_update_page():
         selected_run_ids = []
 
     # --- 3) Fetch records ---
+    force_refresh = st.checkbox("Force full refresh from API", value=False)
     if st.button("Fetch dataset records") and selected_run_ids:
         with st.spinner("Fetching records..."):
-            raw = get_dataset_records(selected_run_ids)
+            raw = get_dataset_records(selected_run_ids, force_refresh=force_refresh)
             st.session_state["records_df"] = safe_df(raw)
 
     df = st.session_state.get("records_df")
@@ -257,20 +242,35 @@ def bulk_update_page():
 
     # --- 8) Execute bulk update ---
     if st.checkbox("Confirm bulk update") and st.button("Run now"):
-        results = []
-        with st.spinner("Sending bulk updates..."):
-            for run_id in selected_run_ids:
-                for qa_user_id, qids in assignments.items():
-                    try:
-                        ok, msg = bulk_update_qa(run_id, qids, qa_user_id, "ready_for_qa")
-                    except Exception as e:
-                        ok, msg = False, f"Exception: {e}"
-                    results.append({
-                        "pipeline_run_id": run_id,
-                        "qa_user_id": qa_user_id,
-                        "count": len(qids),
-                        "success": ok,
-                        "msg": msg
-                    })
-        st.success("Bulk update completed.")
-        st.dataframe(pd.DataFrame(results))
+        # Each question only goes to the run that owns it, in bounded chunks
+        chunks, unrouted = plan_bulk_updates(assignments, df)
+        headers = {"Authorization": f"Bearer {st.session_state.token}"}
+        progress_bar = st.progress(0)
+        with st.spinner(f"Sending {len(chunks)} bulk update chunks..."):
+            results = run_bulk_updates(
+                chunks, headers, "ready_for_qa",
+                on_progress=lambda done, total: progress_bar.progress(done / total),
+            )
+        progress_bar.empty()
+        for qa_user_id, qids in unrouted.items():
+            results.append({
+                "pipeline_run_id": None,
+                "qa_user_id": qa_user_id,
+                "chunk": None,
+                "count": len(qids),
+                "attempts": 0,
+                "success": False,
+                "msg": "No owning run found in fetched records",
+            })
+
+        # Updated runs must be refetched on the next sync
+        get_record_store().invalidate({c["pipeline_run_id"] for c in chunks})
+        invalidate_reference_cache("pipeline_runs")
+
+        results_df = pd.DataFrame(results)
+        failed = results_df[~results_df["success"]] if not results_df.empty else results_df
+        if failed.empty:
+            st.success("Bulk update completed.")
+        else:
+            st.warning(f"Bulk update finished with {len(failed)} failed chunk(s).")
+        st.dataframe(results_df)
@@ -1,7 +1,7 @@
 import streamlit as st
-import pandas as pd
 from utils.api import get_users
 from utils.reports import generate_report
+from utils.record_table import decode_categoricals
 from utils.state import init_session_state
 
 # init_session_state()
@@ -13,11 +13,10 @@ def dashboard_page():
         # st.write(st.session_state.user_data)
         st.write(st.session_state.token)
     st.success(f"{len(st.session_state.user_data)} users loaded.")
-    for run_id, data in st.session_state.pipeline_data.items():
+    for run_id, df in st.session_state.pipeline_data.items():
         with st.expander(f"Run ID: {run_id}"):
-            df = pd.DataFrame(data)
-            st.dataframe(df.head())
-            report = generate_report(data)
+            st.dataframe(decode_categoricals(df.head()))
+            report = generate_report(df)
             if not report.empty:
                 st.subheader("Status Report")
                 st.dataframe(report)
@@ -2,14 +2,20 @@ import streamlit as st
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-from config import COMPLETED_STATUS, QA_DONE_STATUS, INCOMPLETE_STATUS, BASE_COLUMNS, USABLE_COLUMNS
+from config import INCOMPLETE_STATUS, BASE_COLUMNS, USABLE_COLUMNS
+from config import PREFETCH_ENABLED, PREFETCH_RECENT_PROJECTS, PREFETCH_WAIT_SECONDS, CYCLE_MIN_QA_SAMPLES, CYCLE_MIN_PASS_COUNT
 from utils.api import get_projects, get_datasets_by_project, get_dataset_records
-from utils.data_processing import get_performance_tier
+from utils.normalize import normalize_records
+from utils.record_table import decode_categoricals
+from utils.report_engine import compute_report, compute_report_from_counts, PROJECT_REPORT_METRICS
+from utils.report_store import report_counts
+from utils.memo import memoize
+from utils.quality_cycles import dataset_qa_counts, segment_cycles
+from utils.visualizations import cycle_sweep_panel
+from utils.client import token_scope
+from utils.prefetch import get_prefetcher, recent_projects, remember_projects
 from st_aggrid import AgGrid, GridOptionsBuilder
 from datetime import datetime
-import re
-
-DATE_PATTERN = r"(20\d{6})"  # e.g. 20251116
 
 def load_projects():
     """Load and cache projects data"""
@@ -19,9 +25,15 @@ def load_datasets(project_id):
     """Load and cache datasets for a specific project"""
     return get_datasets_by_project(project_id)
 
-def load_dataset_records(dataset_ids):
+def load_dataset_records(dataset_ids, force_refresh=False):
     """Load and cache dataset records"""
-    return get_dataset_records(dataset_ids)
+    return get_dataset_records(dataset_ids, force_refresh=force_refresh)
+
+def on_projects_selected():
+    """Start warming newly selected projects before the page reruns."""
+    selected = st.session_state.report_project_ids
+    get_prefetcher().submit(selected, st.session_state.token)
+    remember_projects(selected, scope=token_scope(st.session_state.token))
 
 def initialize_session_state():
     """Initialize session state variables if they don't exist"""
@@ -55,9 +67,6 @@ def fetch_project_data(selected_project_id):
         st.warning("No records found for selected project.")
         return False
 
-    # Store raw records for download
-    st.session_state.raw_records_df = records_df
-    
     if records_df.empty:
         st.warning("No records found for selected project.")
         return False
@@ -75,47 +84,42 @@ def fetch_project_data(selected_project_id):
     
     return True
 
+def build_project_report(records_df):
+    """Status pivot and per-(project, assignee, dataset) report of the records (no rendering)."""
+    keys = ["project_name", "assignee_name", "dataset_name"]
+    labels = {"project_name": "Unknown Project", "assignee_name": "Unassigned", "dataset_name": "Unknown Dataset"}
+    # Materialized counts (kept up to date from sync deltas) when they cover these records
+    counts = report_counts(records_df, st.session_state.get("user_data", {}))
+
+    # Raw data grouped by dataset, assignee, and status
+    if counts is not None:
+        pivot = counts.groupby(
+            ['project_name','dataset_name','assignee_name', 'status'], observed=True
+        )["size"].sum().unstack(fill_value=0)
+        report_df = compute_report_from_counts(counts, keys, PROJECT_REPORT_METRICS, labels=labels)
+    else:
+        pivot = sanitize_for_streamlit(records_df).groupby(
+            ['project_name','dataset_name','assignee_name', 'status'], observed=True
+        ).size().unstack(fill_value=0)
+        report_df = compute_report(records_df, keys, PROJECT_REPORT_METRICS, labels=labels)
+    # Plain status headers: Arrow can't round-trip a categorical column index
+    pivot.columns = pivot.columns.astype(object)
+    return pivot, report_df
+
+def memo(records_df, name, compute, *args):
+    """Reuse `compute()` across reruns while the records (and settings) are unchanged."""
+    return memoize(records_df, name, compute, *args, user_data=st.session_state.get("user_data", {}))
+
 def process_records_to_report(records_df):
     """Process raw records into a report dataframe"""
+    pivot, report_df = memo(records_df, "project_report", lambda: build_project_report(records_df))
     # Show raw data grouped by dataset, assignee, and status
-    st.dataframe(sanitize_for_streamlit(records_df).groupby(
-        ['project_name','dataset_name','assignee_name', 'status']
-    ).size().unstack(fill_value=0))
-    
-    report_rows = []
-    for (project_name, assignee_name, dataset_name), group in records_df.groupby(
-            ["project_name","assignee_name", "dataset_name"]
-        ):
-        total = len(group)
-        completed = len(group[group["status"].str.lower().isin(COMPLETED_STATUS)])
-        comp_rate = round((completed / total) * 100, 2) if total else 0
-        qa_completed = len(group[group["status"].str.lower().isin(QA_DONE_STATUS)])
-        qa_comp_rate = round((qa_completed / completed) * 100, 2) if completed and completed > 0 else 0
-        
-        qa_p = len(group[group["qa_flag"].str.lower() == "pass"])
-        qa_f = len(group[group["qa_flag"].str.lower() == "fail"])
-        qa_pass_rate = round((qa_p / qa_completed) * 100, 2) if qa_completed and qa_completed > 0 else 0
-
-        report_rows.append({
-            "project_name": project_name or "Unknown Project",
-            "assignee_name": assignee_name or "Unassigned",
-            "dataset_name": dataset_name or "Unknown Dataset",
-            "total_assigned": total,
-            "total_completed": completed,
-            "comp_rate": comp_rate,
-            "total_qa": qa_completed,
-            "qa_comp_rate": qa_comp_rate,
-            "qa_pass": qa_p,
-            "qa_fail": qa_f,
-            "qa_pass_rate": qa_pass_rate,
-            "performance_tier": get_performance_tier(qa_pass_rate)
-        })
-    
-    if not report_rows:
+    st.dataframe(pivot)
+    if report_df.empty:
         st.warning("No valid data found in datasets.")
         return pd.DataFrame()
-    
-    return pd.DataFrame(report_rows)
+
+    return report_df
 
 def create_summary_report(report_df):
     """Create a summary report grouped by assignee"""
@@ -226,7 +230,7 @@ def create_visualization_streamlit(filtered_df):
             # Only numeric columns can be aggregated for chart
             if col_name in numeric_cols:
                 chart_data = (
-                    filtered_df.groupby("dataset_name")[col_name]
+                    filtered_df.groupby("dataset_name", observed=True)[col_name]
                     .sum()
                     .sort_values(ascending=False)
                 )
@@ -236,7 +240,7 @@ def create_visualization_streamlit(filtered_df):
             else:
                 # For scalar object columns, show counts
                 chart_data = (
-                    filtered_df.groupby("dataset_name")[col_name]
+                    filtered_df.groupby("dataset_name", observed=True)[col_name]
                     .agg(lambda x: x.nunique())
                     .sort_values(ascending=False)
                 )
@@ -279,124 +283,6 @@ def make_columns_unique(df: pd.DataFrame) -> pd.DataFrame:
 
 
 
-def extract_date_from_dataset(dataset_name: str):
-    """Extract date from dataset_name."""
-    if not isinstance(dataset_name, str):
-        return None
-    m = re.search(DATE_PATTERN, dataset_name)
-    return pd.to_datetime(m.group(1), format="%Y%m%d") if m else None
-
-
-def build_annotator_quality_cycles(
-    df: pd.DataFrame,
-    min_qa_samples_per_cycle: int = 30,
-    min_pass_count_per_cycle: int = 20,
-):
-    """
-    Build cycle-based QA quality report per annotator.
-    Each cycle ends when QA-completed count >= min_qa_samples_per_cycle.
-    """
-
-    # --- PREPARE DATA ---
-    df = df.copy()
-    df["dataset_date"] = df["dataset_name"].apply(extract_date_from_dataset)
-
-    # Filter only completed + QA-done rows
-    df["is_completed"] = df["status"].str.lower().isin(COMPLETED_STATUS)
-    df["is_qa_done"] = df["status"].str.lower().isin(QA_DONE_STATUS)
-
-    result_cycles = []     # One row per CYCLE
-    result_rework = []     # Datasets flagged for rework
-
-    # --- PROCESS PER ANNOTATOR ---
-    for annotator, g_annotator in df.groupby("assignee_name"):
-
-        # Sort datasets chronologically
-        g_annotator = g_annotator.sort_values("dataset_date")
-
-        cycle_id = 1
-        cycle_pass = 0
-        cycle_fail = 0
-        cycle_qa_count = 0
-        cycle_datasets = []
-
-        # Loop by dataset in chronological order
-        for dataset_name, g_ds in g_annotator.groupby("dataset_name"):
-
-            ds_pass = (g_ds["qa_flag"].str.lower() == "pass").sum()
-            ds_fail = (g_ds["qa_flag"].str.lower() == "fail").sum()
-            ds_qa = ds_pass + ds_fail
-
-            # Add into cycle
-            cycle_pass += ds_pass
-            cycle_fail += ds_fail
-            cycle_qa_count += ds_qa
-            cycle_datasets.append(dataset_name)
-
-            # ---- Check if cycle is complete ----
-            if cycle_qa_count >= min_qa_samples_per_cycle:
-                accuracy = (cycle_pass / cycle_qa_count * 100) if cycle_qa_count else 0
-                tier = get_performance_tier(accuracy)
-
-                # Cycle completed → record it
-                result_cycles.append({
-                    "assignee_name": annotator,
-                    "cycle_id": cycle_id,
-                    "cycle_total_qa": cycle_qa_count,
-                    "cycle_pass": cycle_pass,
-                    "cycle_fail": cycle_fail,
-                    "cycle_accuracy": round(accuracy, 2),
-                    "performance_tier": tier,
-                    "datasets_in_cycle": cycle_datasets.copy(),
-                })
-
-                # ---- REWORK LOGIC ----
-                # If pass count < threshold OR accuracy is too low → rework all datasets in this cycle
-                if (cycle_pass < min_pass_count_per_cycle) or (accuracy < 60):
-                # if (cycle_pass < min_pass_count_per_cycle):  
-                    for d in cycle_datasets:
-                        result_rework.append({
-                            "assignee_name": annotator,
-                            "cycle_id": cycle_id,
-                            "dataset_name": d,
-                            "reason": "LOW_PASS_COUNT" if cycle_pass < min_pass_count_per_cycle else "LOW_ACCURACY",
-                            "cycle_accuracy": round(accuracy, 2),
-                            "cycle_pass": cycle_pass,
-                            "cycle_total_qa": cycle_qa_count
-                        })
-
-                # Reset for next cycle
-                cycle_id += 1
-                cycle_pass = 0
-                cycle_fail = 0
-                cycle_qa_count = 0
-                cycle_datasets = []
-
-        # If leftover mini-cycle at end with too few QA → ignore it (incomplete)
-        # --- If leftover cycle has some QA but not enough to meet threshold ---
-        if cycle_qa_count > 0:
-            accuracy = (cycle_pass / cycle_qa_count * 100) if cycle_qa_count else 0
-            tier = get_performance_tier(accuracy)
-
-            result_cycles.append({
-                "assignee_name": annotator,
-                "cycle_id": cycle_id,
-                "cycle_total_qa": cycle_qa_count,
-                "cycle_pass": cycle_pass,
-                "cycle_fail": cycle_fail,
-                "cycle_accuracy": round(accuracy, 2),
-                "performance_tier": tier,
-                "datasets_in_cycle": cycle_datasets.copy(),
-                "is_incomplete_cycle": True
-            })
-
-    df_cycles = pd.DataFrame(result_cycles)
-    df_rework = pd.DataFrame(result_rework)
-
-    return df_cycles, df_rework
-
-
-
 def reports_page():
     """Main function for the reports page (now supports multiple projects)"""
     st.header("📊 Multi-Project Completion Report")
@@ -407,23 +293,42 @@ def reports_page():
         st.warning("No projects found. Please check API or authentication.")
         return
 
+    # --- Warm this user's usual projects while they are still choosing (opt-in) ---
+    # (Streamlit has no hover events, so recently used projects stand in for "highlighted")
+    prefetcher = get_prefetcher()
+    if PREFETCH_ENABLED:
+        known = {str(p): p for p in projects}
+        recent = recent_projects(PREFETCH_RECENT_PROJECTS, scope=token_scope(st.session_state.token))
+        prefetcher.submit([known[p] for p in recent if p in known], st.session_state.token)
+
     # --- Multi-select projects ---
     selected_project_ids = st.multiselect(
         "Select one or more projects",
         options=list(projects.keys()),
         format_func=lambda x: projects[x],
         help="You can select multiple projects to view combined reports.",
+        key="report_project_ids",
+        on_change=on_projects_selected,
     )
 
     if not selected_project_ids:
         st.info("Select one or more projects to continue.")
         return
 
+    force_refresh = st.checkbox(
+        "Force full refresh from API",
+        value=False,
+        help="Ignore the local record store and re-download every dataset.",
+    )
+
     # --- Fetch Data for All Selected Projects ---
     all_records = []
 
     with st.expander("Fetching datasets and records for selected projects..."):
         with st.spinner("May take a while depending on data size..."):
+            # Collect datasets across every selected project so all pages can be
+            # scheduled together instead of project by project
+            dataset_project = {}
             for project_id in selected_project_ids:
                 project_name = projects[project_id]
                 datasets = load_datasets(project_id)
@@ -431,14 +336,21 @@ def reports_page():
                     st.warning(f"No datasets found for {project_name}")
                     continue
 
-                dataset_ids = [d["dataset_id"] for d in datasets if d.get("dataset_id")]
-                if not dataset_ids:
-                    continue
+                for d in datasets:
+                    if d.get("dataset_id"):
+                        dataset_project.setdefault(d["dataset_id"], project_id)
 
-                records_df = load_dataset_records(dataset_ids)
+            if dataset_project:
+                # Join any prefetch still running for these projects instead of duplicating it
+                prefetcher.wait(selected_project_ids, st.session_state.token, timeout=PREFETCH_WAIT_SECONDS)
+                records_df = load_dataset_records(list(dataset_project), force_refresh=force_refresh)
                 if records_df is not None and not records_df.empty:
-                    records_df["project_id"] = project_id
-                    records_df["project_name"] = project_name
+                    records_df["project_id"] = records_df["dataset_id"].map(dataset_project)
+                    records_df["project_name"] = records_df["project_id"].map(projects)
+                    normalize_records(records_df, ["project_name"])
+                    records_df.attrs["dataset_columns"] = {
+                        "project_name": {ds: projects.get(p) for ds, p in dataset_project.items()}
+                    }
                     all_records.append(records_df)
 
     if not all_records:
@@ -450,11 +362,11 @@ def reports_page():
     # combined_records = pd.concat(all_records, ignore_index=True)
     combined_records = make_columns_unique(combined_records)
 
-    st.session_state.raw_records_df = combined_records
-
     # --- Process into report ---
     combined_report = process_records_to_report(combined_records)
-    combined_summary = create_summary_report(sanitize_for_streamlit(combined_report))
+    combined_summary = memo(
+        combined_records, "summary", lambda: create_summary_report(sanitize_for_streamlit(combined_report))
+    )
     st.session_state.report_df = combined_report
     st.session_state.summary_df = combined_summary
 
@@ -495,13 +407,26 @@ def reports_page():
     st.metric("Total QA Done", combined_summary["total_qa"].sum())
 
     # --- Download Combined Data ---
-    csv = filtered_df.to_csv(index=False, encoding="utf-8-sig")
-    json = filtered_df.to_json(orient="records", indent=2, force_ascii=False)
+    filters = (tuple(selected_projects), tuple(selected_datasets))
+    csv = memo(
+        combined_records, "report_csv",
+        lambda: decode_categoricals(filtered_df).to_csv(index=False, encoding="utf-8-sig"), filters,
+    )
+    json = memo(
+        combined_records, "report_json",
+        lambda: decode_categoricals(filtered_df).to_json(orient="records", indent=2, force_ascii=False), filters,
+    )
     st.download_button("⬇️ Download Combined CSV", csv, f"multi_project_report.csv", "text/csv")
     st.download_button("⬇️ Download Combined JSON", json, f"multi_project_report.json", "application/json")
 
-    csv2 = combined_records.to_csv(index=False, encoding="utf-8-sig")
-    json2 = combined_records.to_json(orient="records", indent=2, force_ascii=False)
+    csv2 = memo(
+        combined_records, "records_csv",
+        lambda: decode_categoricals(combined_records).to_csv(index=False, encoding="utf-8-sig"),
+    )
+    json2 = memo(
+        combined_records, "records_json",
+        lambda: decode_categoricals(combined_records).to_json(orient="records", indent=2, force_ascii=False),
+    )
     st.download_button("⬇️ Download Combined CSV", csv2, f"multi_project_report-combined_records.csv", "text/csv")
     st.download_button("⬇️ Download Combined JSON", json2, f"multi_project_report-combined_records.json", "application/json")
 
@@ -509,9 +434,21 @@ def reports_page():
     create_visualization(combined_report)
     # create_visualization_streamlit(combined_records)
 
-    df_cycles, df_rework = build_annotator_quality_cycles(combined_records,120,90)
+    # --- Annotator quality cycles ---
+    st.subheader("🔁 Annotator Quality Cycles")
+    col1, col2 = st.columns(2)
+    min_qa = col1.number_input("Min QA samples per cycle", min_value=1, value=CYCLE_MIN_QA_SAMPLES, key="cycle_min_qa")
+    min_pass = col2.number_input("Min pass count per cycle", min_value=0, value=CYCLE_MIN_PASS_COUNT, key="cycle_min_pass")
+    cycle_counts = memo(combined_records, "cycle_counts", lambda: dataset_qa_counts(combined_records))
+    df_cycles, df_rework = memo(
+        combined_records, "cycles", lambda: segment_cycles(cycle_counts, int(min_qa), int(min_pass)),
+        int(min_qa), int(min_pass),
+    )
     st.dataframe(df_cycles)
     st.dataframe(df_rework)
 
+    with st.expander("Threshold sweep"):
+        cycle_sweep_panel(cycle_counts, key="cycle_sweep")
+
 #TODO: data profiling
 #TODO: data builder
\ No newline at end of file
@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime
 from utils.api import get_pipeline_runs, get_pipeline_data
 from utils.visualizations import create_visualizations
+from utils.record_table import decode_categoricals
 from utils.state import init_session_state
 from config import BASE_COLUMNS, USABLE_COLUMNS
 
@@ -49,18 +50,20 @@ def query_data_page():
             with st.spinner(f"Fetching data for run ID: {selected_run_id}..."):
                 data = get_pipeline_data(selected_run_id)
 
-            if not data:
+            if data.empty:
                 st.warning("No data found for this pipeline run.")
                 st.session_state.queried_data = None
                 st.session_state.current_run_id = None
                 return
 
-            st.session_state.queried_data = pd.DataFrame(data).drop_duplicates(subset="id",keep="first")
+            # Only copy the run's frame (already held in pipeline_data) when there is something to drop
+            duplicated = data.duplicated(subset="id", keep="first")
+            st.session_state.queried_data = data[~duplicated] if duplicated.any() else data
             st.session_state.current_run_id = selected_run_id
             st.session_state.processed_df = None
 
         # Use cached data
-        df = st.session_state.queried_data.copy()
+        df = st.session_state.queried_data.copy(deep=False)
 
         # # --- Simple Query Box ---
         # st.markdown("### 🔎 Quick Data Query")
@@ -120,7 +123,8 @@ def query_data_page():
                             selected_columns.append(c_name)
 
             if selected_columns:
-                df_display = df[selected_columns].copy()
+                # Plain values for display, queries and downloads
+                df_display = decode_categoricals(df[selected_columns].copy())
 
                 # --- Column Renaming (3 columns per row) ---
                 st.markdown("### ✏️ Step 2: Rename Columns (Optional)")
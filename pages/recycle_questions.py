@@ -2,28 +2,51 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from utils.data_processing import filter_undone_questions, assign_questions_by_capacity, csv_to_json_zip
-from utils.api import upload_zip_file
+from utils.api import upload_zip_file, iter_pipeline_data
+from utils.fetch import fold_pages, PageFetchError
+from utils.record_table import concat_records, decode_categoricals
 from utils.state import init_session_state
+from utils.visualizations import sharded_upload_panel
 
 # init_session_state()
 
 
+def stream_undone_questions(run_id):
+    """Stream a run page by page and keep only the undone rows of each page."""
+    parts = fold_pages(
+        iter_pipeline_data(run_id),
+        lambda acc, chunk: acc + [filter_undone_questions(chunk)],
+        initial=[],
+    )
+    return concat_records(parts) if parts else pd.DataFrame()
+
+
 def recycle_page():
     st.header("Recycle Undone Questions")
-    if not st.session_state.pipeline_data:
+
+    # Streamed runs never hold their completed rows in memory
+    stream_id = st.text_input("Stream undone questions from a pipeline run ID (optional)")
+    if stream_id and st.button("Stream undone questions"):
+        with st.spinner(f"Streaming run {stream_id}..."):
+            try:
+                st.session_state.recycle_undone = {stream_id: stream_undone_questions(stream_id)}
+            except PageFetchError as e:
+                st.error(f"Failed to stream page {e.page}: {e}")
+
+    sources = {**st.session_state.pipeline_data, **st.session_state.get("recycle_undone", {})}
+    if not sources:
         st.info("No pipeline data loaded yet.")
         return
 
-    run_id = st.selectbox("Select Pipeline Run", list(st.session_state.pipeline_data.keys()))
-    data = st.session_state.pipeline_data[run_id]
-    undone = filter_undone_questions(data)
-    st.write(f"Found {len(undone)} undone questions.")
+    run_id = st.selectbox("Select Pipeline Run", list(sources.keys()))
+    data = sources[run_id]
+    df = filter_undone_questions(data)
+    st.write(f"Found {len(df)} undone questions.")
 
-    if not undone:
+    if df.empty:
         return
 
-    df = pd.DataFrame(undone)
-    st.dataframe(df)
+    st.dataframe(decode_categoricals(df))
 
     cap_file = st.file_uploader("Upload Capacity CSV", type=["csv"])
     if not cap_file:
@@ -32,8 +55,14 @@ def recycle_page():
     cap_df = pd.read_csv(cap_file)
     st.dataframe(cap_df)
 
-    if st.button("Assign and Upload"):
-        assigned = assign_questions_by_capacity(undone, cap_df)
-        new_name = f"recycled_{run_id}_{datetime.now().strftime('%Y%m%d')}"
-        zip_file = csv_to_json_zip(pd.DataFrame(assigned))
+    new_name = f"recycled_{run_id}_{datetime.now().strftime('%Y%m%d')}"
+    if st.checkbox("Upload in shards (large rounds)", key="recycle_sharded"):
+        if st.button("Assign"):
+            st.session_state.recycle_assigned = pd.DataFrame(assign_questions_by_capacity(df.to_dict("records"), cap_df))
+        assigned_df = st.session_state.get("recycle_assigned")
+        if assigned_df is not None:
+            sharded_upload_panel(assigned_df, f"recycled_{run_id}", new_name, key="recycle")
+    elif st.button("Assign and Upload"):
+        assigned = assign_questions_by_capacity(df.to_dict("records"), cap_df)
+        zip_file = csv_to_json_zip(pd.DataFrame(assigned), spool=True)
         upload_zip_file(zip_file, f"recycled_{run_id}", new_name)
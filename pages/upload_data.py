@@ -3,6 +3,7 @@ import pandas as pd
 from config import PREFIX, SFT_ROUND
 from utils.api import get_users, upload_zip_file
 from utils.data_processing import csv_to_json_zip
+from utils.visualizations import sharded_upload_panel
 from utils.state import init_session_state
 
 # init_session_state()
@@ -103,10 +104,14 @@ def upload_data_page():
             run_id = st.text_input("Pipeline Run ID")
             dataset_name = st.text_input("Dataset Name")
 
-            if st.button("Prepare and Upload"):
+            sharded = st.checkbox("Upload in shards (large rounds)", key="upload_sharded")
+            if sharded:
+                # Each shard becomes its own run: <run_id>-partNNN
+                sharded_upload_panel(updated_df, run_id, dataset_name, key="upload")
+            elif st.button("Prepare and Upload"):
                 if run_id and dataset_name:
                     with st.spinner("Preparing and uploading data..."):
-                        zip_file = csv_to_json_zip(updated_df)
+                        zip_file = csv_to_json_zip(updated_df, spool=True)
 
                         if upload_zip_file(zip_file, run_id, dataset_name):
                             st.success("Data uploaded successfully!")
@@ -126,7 +131,7 @@ def upload_data_page():
                         if run_id and dataset_name:
                             with st.spinner("Preparing and uploading data..."):
                                 # Convert to JSON and zip
-                                zip_file = csv_to_json_zip(updated_df)
+                                zip_file = csv_to_json_zip(updated_df, spool=True)
 
                                 # Upload to platform
                                 if upload_zip_file(zip_file, run_id, dataset_name):
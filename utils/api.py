@@ -1,17 +1,46 @@
 import streamlit as st
-import requests
-from config import API_BASE_URL
+from utils import client
+from utils.fetch import PageFetchError, fetch_page_chunk, fetch_pages, iter_pipeline_pages
+from utils.columnar import ColumnarFrameBuilder
+from utils.sync import sync_datasets
+from utils.cache import REFERENCE_CACHE
+from utils.bulk import post_qa_update
+from utils.prefetch import fetch_project, project_datasets
+from utils.normalize import normalize_records, resolve_assignee_names
+from utils.record_table import concat_records, constant_column
+from utils.report_store import REPORT_COUNTS
+from utils.upload import failed_parts, post_zip_upload, run_sharded_upload, unknown_parts
+from config import API_BASE_URL, PAGE_FETCH_WORKERS, UPLOAD_SHARD_ROWS
 from typing import List, Dict, Tuple
 import pandas as pd
 
+def get_cached_json(url: str, headers: Dict, *key):
+    """GET a rarely-changing JSON resource through the process-wide reference cache.
+
+    Entries are keyed by `key` plus the token scope and shared across sessions;
+    failed responses are never cached.
+
+    Returns:
+        (data, response) -- response is None on a cache hit, data is None on failure
+    """
+    cache_key = (*key, client.token_scope(st.session_state.token))
+    data = REFERENCE_CACHE.get(cache_key)
+    if data is not None:
+        return data, None
+    response = client.get(url, headers=headers)
+    if response.status_code != 200:
+        return None, response
+    data = response.json()
+    REFERENCE_CACHE.set(cache_key, data)
+    return data, response
+
 def get_users():
     if not st.session_state.token:
         st.error("Please login first")
         return {}
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    response = requests.get(f"{API_BASE_URL}/api/v1/users", headers=headers)
-    if response.status_code == 200:
-        users = response.json()
+    users, response = get_cached_json(f"{API_BASE_URL}/api/v1/users", headers, "users")
+    if users is not None:
         st.session_state.user_data = {u["username"]: u["id"] for u in users}
         return st.session_state.user_data
     st.error(f"Failed to get users: {response.text}")
@@ -19,18 +48,16 @@ def get_users():
 
 def map_username_from_assignee(df):
     if 'assignee' not in df.columns:
-        return pd.Series(["Unknown"] * len(df))
-    username_to_id = {v: k for k, v in st.session_state.user_data.items()}
-    return df['assignee'].map(lambda x: username_to_id.get(x, "Unknown"))
+        return pd.Series(["Unknown"] * len(df), index=df.index, dtype="category")
+    return resolve_assignee_names(df['assignee'], st.session_state.user_data)
 
 def get_users_with_roles():
     if not st.session_state.get('token'):
         st.error("Please login first (set st.session_state['token']).")
         return {}
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    response = requests.get(f"{API_BASE_URL}/api/v1/users", headers=headers)
-    if response.status_code == 200:
-        users = response.json()
+    users, response = get_cached_json(f"{API_BASE_URL}/api/v1/users", headers, "users")
+    if users is not None:
         out = {}
         for u in users:
             username = u.get('username') or u.get('name') or u.get('email')
@@ -51,92 +78,160 @@ def upload_zip_file(zip_file, run_id, name):
         st.error("Please login first")
         return False
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    files = {"file": (f"{name}.zip", zip_file, "application/zip")}
-    data = {"run_id": run_id, "run_name": name, "modality": "text", "data_type": "sft"}
-    response = requests.post(f"{API_BASE_URL}/api/v1/data_v2/upload", headers=headers, files=files, data=data)
-    if response.status_code == 200:
+    ok, msg = post_zip_upload(zip_file, run_id, name, headers)
+    if ok:
         st.success(f"Uploaded {name} successfully!")
         return True
-    st.error(f"Upload failed: {response.text}")
+    st.error(f"Upload failed: {msg}")
     return False
 
+def upload_sharded(df: pd.DataFrame, run_id: str, name: str, by: str = None,
+                   shard_rows: int = UPLOAD_SHARD_ROWS, parts: List[int] = None) -> Dict:
+    """Upload `df` as `-partNNN` runs (see utils.upload.run_sharded_upload) and return the manifest."""
+    if not st.session_state.token:
+        st.error("Please login first")
+        return {}
+    headers = {"Authorization": f"Bearer {st.session_state.token}"}
+    progress_bar = st.progress(0)
+    manifest = run_sharded_upload(
+        df, run_id, name, headers, by=by, shard_rows=shard_rows, parts=parts,
+        on_progress=lambda done, total: progress_bar.progress(done / total),
+    )
+    progress_bar.empty()
+    failed = failed_parts(manifest)
+    if failed:
+        st.error(f"{len(failed)} of {len(manifest['parts'])} part(s) failed: {failed}")
+    elif not unknown_parts(manifest):  # sharded_upload_panel warns about those
+        st.success(f"Uploaded {len(manifest['parts'])} part(s) of {name} successfully!")
+    return manifest
+
 def get_pipeline_runs():
     if not st.session_state.token:
         st.error("Please login first")
         return []
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    response = requests.get(f"{API_BASE_URL}/api/v1/data_v2/pipeline", headers=headers)
-    if response.status_code == 200:
-        runs = response.json()
+    runs, response = get_cached_json(f"{API_BASE_URL}/api/v1/data_v2/pipeline", headers, "pipeline_runs")
+    if runs is not None:
         st.session_state.pipeline_runs = runs
+        remember_dataset_meta(
+            run for run in runs if isinstance(run, dict) and run.get("id") is not None
+        )
         return runs
     st.error(f"Failed to get pipeline runs: {response.text}")
     return []
 
-def get_pipeline_data(pipeline_run_id: str) -> List[Dict]:
-    """Get all data from a pipeline run, handling pagination."""
+def remember_dataset_meta(entries):
+    """Record dataset metadata (id, run_name, run_id, ...) in the session's metadata index.
+
+    Accepts pipeline run objects or flattened project datasets; later lookups
+    in get_dataset_records use the index instead of `/pipeline/{id}`.
+    """
+    index = st.session_state.setdefault("dataset_meta", {})
+    for e in entries:
+        dataset_id = e.get("dataset_id", e.get("id"))
+        meta = {
+            "id": dataset_id,
+            "run_name": e.get("dataset_name") or e.get("run_name") or e.get("name"),
+            "run_id": e.get("run_id"),
+            "status": e.get("dataset_status", e.get("status")),
+            "updated_at": e.get("updated_at"),
+            "total_rows": e.get("total_rows", e.get("row_count")),
+        }
+        # Never let a sparser source blank out fields we already know
+        known = index.get(str(dataset_id), {})
+        index[str(dataset_id)] = {k: v if v is not None else known.get(k) for k, v in meta.items()}
+
+def get_dataset_meta(dataset_id, headers: Dict) -> Dict:
+    """Return dataset metadata from the index, calling `/pipeline/{id}` only on a miss."""
+    meta = st.session_state.get("dataset_meta", {}).get(str(dataset_id))
+    if meta and meta.get("run_id"):
+        return meta
+
+    response = client.get(f"{API_BASE_URL}/api/v1/data_v2/pipeline/{dataset_id}", headers=headers)
+    if response.status_code != 200:
+        return None
+    # Index under the requested id: the body's own id field may be missing or formatted differently
+    remember_dataset_meta([{**response.json(), "dataset_id": dataset_id}])
+    return st.session_state.dataset_meta[str(dataset_id)]
+
+def get_pipeline_data(pipeline_run_id: str, max_workers: int = PAGE_FETCH_WORKERS) -> pd.DataFrame:
+    """Get all data from a pipeline run as one DataFrame, handling pagination.
+
+    Page 1 is fetched first to learn `total_pages`; the remaining pages are
+    then fetched concurrently (at most `max_workers` at a time). Each page is
+    decoded straight into column buffers and the frame is assembled in page
+    order, so no list of record dicts is ever held.
+    """
     if not st.session_state.token:
         st.error("Please login first")
-        return []
+        return pd.DataFrame()
     
     try:
         headers = {"Authorization": f"Bearer {st.session_state.token}"}
-        all_data = []
-        page = 1
-        total_pages = 1
         
         # Create a progress bar
         progress_bar = st.progress(0)
         status_text = st.empty()
-        
-        while page <= total_pages:
-            # Update status
-            status_text.text(f"Fetching page {page} of {total_pages}...")
-            
-            # Make request for current page
-            response = requests.get(
-                f"{API_BASE_URL}/api/v1/data_v2/pipeline/{pipeline_run_id}/data",
-                headers=headers,
-                params={"page": page}
+        status_text.text("Fetching page 1...")
+
+        try:
+            first = fetch_page_chunk(pipeline_run_id, 1, headers)
+        except PageFetchError as e:
+            st.error(f"Failed to get pipeline data for page 1: {e}")
+            first = None
+
+        builder = ColumnarFrameBuilder()
+        if first is not None:
+            total_pages = first.total_pages
+            st.info(f"Found {first.total_rows} records across {total_pages} pages")
+            builder.add(1, first.chunk)
+            progress_bar.progress(1 / total_pages)
+
+            def on_page(done, _remaining):
+                status_text.text(f"Fetched {done + 1} of {total_pages} pages...")
+                progress_bar.progress((done + 1) / total_pages)
+
+            fetched, errors = fetch_pages(
+                pipeline_run_id, range(2, total_pages + 1), headers,
+                max_workers=max_workers, on_page=on_page,
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Update total_pages from the first response
-                if page == 1:
-                    total_pages = result.get("total_pages", 1)
-                    total_rows = result.get("total_rows", 0)
-                    st.info(f"Found {total_rows} records across {total_pages} pages")
-                
-                # Add data from current page
-                page_data = result.get("data", [])
-                all_data.extend(page_data)
-                
-                # Update progress
-                progress = page / total_pages
-                progress_bar.progress(progress)
-                
-                # Move to next page
-                page += 1
-            else:
-                st.error(f"Failed to get pipeline data for page {page}: {response.text}")
-                break
+            for page, chunk in fetched.items():
+                builder.add(page, chunk)
+
+            # Keep the contiguous run of pages before the first failure
+            if errors:
+                first_failed = min(errors)
+                st.error(f"Failed to get pipeline data for page {first_failed}: {errors[first_failed]}")
+                builder.truncate(first_failed)
+
+        df = builder.to_frame()
         
         # Clear progress indicators
         progress_bar.empty()
         status_text.empty()
         
         # Store all data in session state
-        st.session_state.pipeline_data[pipeline_run_id] = all_data
+        st.session_state.pipeline_data[pipeline_run_id] = df
         
         # Show success message
-        st.success(f"Successfully fetched {len(all_data)} records")
+        st.success(f"Successfully fetched {len(df)} records")
         
-        return all_data
+        return df
     except Exception as e:
         st.error(f"Error getting pipeline data: {str(e)}")
-        return []
+        return pd.DataFrame()
+
+def iter_pipeline_data(pipeline_run_id: str, max_workers: int = PAGE_FETCH_WORKERS, ordered: bool = True):
+    """Stream a pipeline run as `(page, chunk_df)` pairs as pages arrive.
+
+    Counterpart of get_pipeline_data for callers that can start work before
+    the last page lands; combine with utils.fetch.fold_pages.
+    """
+    if not st.session_state.token:
+        st.error("Please login first")
+        return iter(())
+    headers = {"Authorization": f"Bearer {st.session_state.token}"}
+    return iter_pipeline_pages(pipeline_run_id, headers, max_workers=max_workers, ordered=ordered)
 
 def bulk_update_pipeline(pipeline_run_id: str, update_data: Dict) -> bool:
     """Bulk update pipeline data."""
@@ -146,7 +241,7 @@ def bulk_update_pipeline(pipeline_run_id: str, update_data: Dict) -> bool:
     
     try:
         headers = {"Authorization": f"Bearer {st.session_state.token}"}
-        response = requests.post(
+        response = client.post(
             f"{API_BASE_URL}/api/v1/data_v2/pipeline/{pipeline_run_id}/bulk-update",
             headers=headers,
             json=update_data
@@ -169,22 +264,13 @@ def bulk_update_qa(pipeline_run_id: str,
     """Call the bulk-update API to assign question ids to a QA reviewer."""
     if not st.session_state.token:
         st.error("Please login first")
-        return False
+        return False, "Please login first"
 
     if not question_ids:
         return True, "No questions to update"
     
-    url = f"{API_BASE_URL}/api/v1/data_v2/pipeline/{pipeline_run_id}/bulk-update"
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    payload = {
-        "questions": question_ids,
-        "new_reviewer": qa_user_id,
-        "new_status": new_status
-    }
-    resp = requests.post(url, json=payload, headers=headers)
-    if resp.status_code in (200, 204):
-        return True, f"Updated {len(question_ids)} items for {qa_user_id}"
-    return False, f"Failed {resp.status_code}: {resp.text}"
+    return post_qa_update(pipeline_run_id, question_ids, qa_user_id, new_status, headers)
     
 def get_projects():
     if not st.session_state.token:
@@ -192,10 +278,9 @@ def get_projects():
         return {}
 
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    response = requests.get(f"{API_BASE_URL}/api/v1/projects", headers=headers)
+    data, response = get_cached_json(f"{API_BASE_URL}/api/v1/projects", headers, "projects")
 
-    if response.status_code == 200:
-        data = response.json()
+    if data is not None:
         # If API returns {"projects": [ ... ]}
         projects = data.get("projects", [])
         st.session_state.projects = {p["id"]: p["name"] for p in projects}
@@ -212,38 +297,26 @@ def get_datasets_by_project(project_id: str):
         return []
 
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    url = f"{API_BASE_URL}/api/v1/projects/{project_id}"
 
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+        # Shares the prefetcher's short-lived cache, so a warmed project costs no request
+        project, response = fetch_project(project_id, headers, st.session_state.token)
+        if project is None:
             st.error(f"Failed to fetch project: {response.status_code} - {response.text}")
             return []
 
-        project = response.json()  # This is a single project object, not a list
-
         if not project or "datasets" not in project:
             st.warning("No datasets found for this project.")
             return []
 
         # Flatten structure: project + each dataset
-        datasets = [
-            {
-                "project_id": project.get("id"),
-                "project_name": project.get("name"),
-                "dataset_id": ds.get("id"),
-                "dataset_name": ds.get("run_name"),  # use run_name since dataset_name not in JSON
-                "dataset_status": ds.get("status"),
-                "modality": ds.get("modality"),
-                "created_at": ds.get("created_at"),
-            }
-            for ds in project.get("datasets", [])
-        ]
+        datasets = project_datasets(project)
 
         # Store in session for quick access
         st.session_state.datasets_data = {
             d["dataset_name"]: d["dataset_id"] for d in datasets
         }
+        remember_dataset_meta(d for d in datasets if d["dataset_id"] is not None)
 
         return datasets
 
@@ -251,9 +324,11 @@ def get_datasets_by_project(project_id: str):
         st.error(f"Error fetching datasets for project {project_id}: {e}")
         return []
 
-def get_dataset_records(dataset_ids):
+def get_dataset_records(dataset_ids, max_workers: int = PAGE_FETCH_WORKERS, force_refresh: bool = False):
     """
-    Fetch and aggregate all dataset records directly from API.
+    Fetch and aggregate all dataset records.
+    Datasets unchanged since the last sync are read from the local record
+    store; the rest are refetched through one shared worker pool.
     """
     if not st.session_state.token:
         st.error("Please login first")
@@ -267,50 +342,76 @@ def get_dataset_records(dataset_ids):
         return pd.DataFrame()
 
     all_records = []
-    total_datasets = len(dataset_ids)
+    names = {}
+    metas = {}
     progress_bar = st.progress(0)
+    status_text = st.empty()
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
 
     try:
-        for i, dataset_id in enumerate(dataset_ids, start=1):
+        for dataset_id in dataset_ids:
             
-            # Get the pipeline information
-            meta_url = f"{API_BASE_URL}/api/v1/data_v2/pipeline/{dataset_id}"
-            meta_resp = requests.get(meta_url, headers=headers)
-            if meta_resp.status_code != 200:
+            # Get the pipeline information (metadata index first, API on a miss)
+            meta = get_dataset_meta(dataset_id, headers)
+            if meta is None:
                 st.warning(f"⚠️ Failed to fetch dataset metadata for {dataset_id}")
                 continue
 
-            meta = meta_resp.json()
-            # st.write(meta)
-            dataset_name = meta.get("run_name") or meta.get("name") or f"Dataset-{dataset_id}"
+            dataset_name = meta.get("run_name") or f"Dataset-{dataset_id}"
             run_id = meta.get("run_id")
 
             if not run_id:
                 st.warning(f"⚠️ No run_id found for dataset {dataset_name}, skipping...")
                 continue
 
-            st.write(f"📦 Fetching records for **{dataset_name}** ({i}/{total_datasets})")
+            names[dataset_id] = dataset_name
+            metas[str(dataset_id)] = meta
 
-            
-            records = get_pipeline_data(dataset_id)
-            # st.write(records)
-            if records:
-                df = pd.DataFrame(records)
-                df["dataset_id"] = dataset_id
-                df["dataset_name"] = dataset_name
-                df["assignee_name"] = map_username_from_assignee(df)
-                all_records.append(df)
+        st.write(f"📦 Syncing records for {len(names)} datasets")
 
-            progress_bar.progress(i / total_datasets)
+        def on_progress(done, total):
+            status_text.text(f"Fetched {done} of {total} pages...")
+            progress_bar.progress(done / total)
+
+        # Stale datasets share one bounded pool, largest datasets first
+        sync = sync_datasets(
+            list(names), metas, headers,
+            max_workers=max_workers, on_progress=on_progress, force_refresh=force_refresh,
+        )
+        for dataset_id, error in sync.errors.items():
+            st.warning(f"⚠️ Failed to fetch records for {names[dataset_id]}: {error}")
+        unchanged = len(names) - len(sync.fetched) - len(sync.errors)
+        if unchanged:
+            st.info(f"{unchanged} unchanged datasets loaded from local store")
+
+        versions = {}
+        for dataset_id, dataset_name in names.items():
+            df = sync.frames.pop(dataset_id, None)
+            if df is not None and not df.empty:
+                if sync.versions.get(dataset_id):
+                    # Stored versions get materialized report counts (once per version, shared)
+                    REPORT_COUNTS.ensure(dataset_id, sync.versions[dataset_id], df)
+                    versions[dataset_id] = sync.versions[dataset_id]
+                df["dataset_id"] = constant_column(dataset_id, len(df))
+                df["dataset_name"] = constant_column(dataset_name, len(df))
+                all_records.append(df)
 
         progress_bar.empty()
+        status_text.empty()
 
         if not all_records:
             st.warning("No dataset records found.")
             return pd.DataFrame()
 
-        combined_df = pd.concat(all_records, ignore_index=True)
+        # Text buffers are shared with the cached frames; encoded columns are recoded, not decoded
+        combined_df = concat_records(all_records)
+        # Resolve names and dictionary-encode low-cardinality fields once, here
+        combined_df["assignee_name"] = map_username_from_assignee(combined_df)
+        normalize_records(combined_df)
+        # Lets the report pages use REPORT_COUNTS instead of regrouping every record
+        combined_df.attrs["dataset_versions"] = versions if len(versions) == len(all_records) else {}
+        combined_df.attrs["dataset_names"] = names
+        combined_df.attrs["rows"] = len(combined_df)
         # combined_df = combined_df.drop_duplicates(subset="id",keep="last")
         st.success(f"✅ Aggregated {len(combined_df)} total records across {len(dataset_ids)} datasets.")
         return combined_df
@@ -330,9 +431,8 @@ def get_dataset_schema(dataset_id):
 
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
     url = f"{API_BASE_URL}/api/v1/data_v2/pipeline/{dataset_id}/schema"
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        schema = response.json()
+    schema, response = get_cached_json(url, headers, "schema", str(dataset_id))
+    if schema is not None:
         return schema
     st.error(f"Failed to get dataset schema: {response.text}")
     return {}
@@ -1,5 +1,5 @@
 import streamlit as st
-import requests
+from utils import client
 from config import API_BASE_URL, ACCESS_TOKEN
 
 def login(username: str = None, password: str = None) -> bool:
@@ -20,7 +20,7 @@ def login(username: str = None, password: str = None) -> bool:
             st.error("Username and password required if no token in config.")
             return False
 
-        response = requests.post(
+        response = client.post(
             f"{API_BASE_URL}/api/v1/auth/token",
             data={"grant_type": "password", "username": username, "password": password}
         )
@@ -0,0 +1,133 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+import requests
+
+from config import API_BASE_URL, BULK_UPDATE_CHUNK_SIZE, BULK_UPDATE_WORKERS, BULK_UPDATE_ATTEMPTS
+from utils import client
+
+
+UNKNOWN_OUTCOME = "Outcome unknown, check before retrying"
+
+
+def _post_update(pipeline_run_id: str, question_ids: List[str], qa_user_id: str,
+                 new_status: str, headers: Dict) -> requests.Response:
+    return client.post(
+        f"{API_BASE_URL}/api/v1/data_v2/pipeline/{pipeline_run_id}/bulk-update",
+        json={"questions": question_ids, "new_reviewer": qa_user_id, "new_status": new_status},
+        headers=headers,
+    )
+
+
+def post_qa_update(pipeline_run_id: str, question_ids: List[str], qa_user_id: str,
+                   new_status: str, headers: Dict) -> Tuple[bool, str]:
+    """POST one bulk-update payload; safe to call from worker threads."""
+    response = _post_update(pipeline_run_id, question_ids, qa_user_id, new_status, headers)
+    if response.status_code in (200, 204):
+        return True, f"Updated {len(question_ids)} items for {qa_user_id}"
+    return False, f"Failed {response.status_code}: {response.text}"
+
+
+def plan_bulk_updates(
+    assignments: Dict[str, List[str]],
+    records_df: pd.DataFrame,
+    chunk_size: int = BULK_UPDATE_CHUNK_SIZE,
+) -> Tuple[List[Dict], Dict[str, List[str]]]:
+    """
+    Route every assigned question id to the run that owns it (from
+    `records_df.dataset_id`) and split each (run, QA) list into chunks.
+
+    Returns:
+        (chunks, unrouted) -- unrouted maps QA user id -> ids with no owning run
+    """
+    owner = dict(zip(records_df["id"].astype(str), records_df["dataset_id"].astype(str)))
+    chunks, unrouted = [], {}
+    for qa_user_id, qids in assignments.items():
+        by_run = {}
+        for qid in qids:
+            run_id = owner.get(str(qid))
+            if run_id is None:
+                unrouted.setdefault(qa_user_id, []).append(qid)
+            else:
+                by_run.setdefault(run_id, []).append(qid)
+        for run_id, ids in by_run.items():
+            for start in range(0, len(ids), max(1, chunk_size)):
+                chunks.append({
+                    "pipeline_run_id": run_id,
+                    "qa_user_id": qa_user_id,
+                    "chunk": start // max(1, chunk_size) + 1,
+                    "question_ids": ids[start:start + chunk_size],
+                })
+    return chunks, unrouted
+
+
+def _send_chunk(chunk: Dict, new_status: str, headers: Dict, max_attempts: int) -> Dict:
+    """
+    Send one chunk, resending it only while the server certainly never got it
+    (connection not established, 429/503); any other failure may already
+    have been applied and is reported as an unknown outcome.
+    """
+    attempts = 0
+    while True:
+        if attempts:
+            time.sleep(random.uniform(0, 2 ** attempts))
+        attempts += 1
+        try:
+            response = _post_update(
+                chunk["pipeline_run_id"], chunk["question_ids"], chunk["qa_user_id"], new_status, headers
+            )
+        except Exception as e:
+            ok, msg = False, f"Exception: {e}"
+            if not client.not_applied(error=e):
+                msg = f"{UNKNOWN_OUTCOME}: {e}"
+                break
+        else:
+            ok = response.status_code in (200, 204)
+            if ok:
+                msg = f"Updated {len(chunk['question_ids'])} items for {chunk['qa_user_id']}"
+                break
+            msg = f"Failed {response.status_code}: {response.text}"
+            if not client.not_applied(status_code=response.status_code):
+                # A 4xx rejected the chunk; a 5xx may have failed after applying it
+                if response.status_code >= 500:
+                    msg = f"{UNKNOWN_OUTCOME}: {msg}"
+                break
+        if attempts >= max(1, max_attempts):
+            break
+    return {
+        "pipeline_run_id": chunk["pipeline_run_id"],
+        "qa_user_id": chunk["qa_user_id"],
+        "chunk": chunk["chunk"],
+        "count": len(chunk["question_ids"]),
+        "attempts": attempts,
+        "success": ok,
+        "msg": msg,
+    }
+
+
+def run_bulk_updates(
+    chunks: List[Dict],
+    headers: Dict,
+    new_status: str = "ready_for_qa",
+    max_workers: int = BULK_UPDATE_WORKERS,
+    max_attempts: int = BULK_UPDATE_ATTEMPTS,
+    on_progress: Callable[[int, int], None] = None,
+) -> List[Dict]:
+    """
+    Send planned chunks concurrently, resending a chunk the server never got
+    up to `max_attempts` times, and return one outcome row per chunk.
+    `on_progress(done, total)` runs in the calling thread.
+    """
+    results = []
+    if not chunks:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [pool.submit(_send_chunk, c, new_status, headers, max_attempts) for c in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            results.append(future.result())
+            if on_progress:
+                on_progress(done, len(chunks))
+    return sorted(results, key=lambda r: (r["pipeline_run_id"], r["qa_user_id"], r["chunk"]))
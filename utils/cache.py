@@ -0,0 +1,246 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+import pandas as pd
+
+from config import REFERENCE_CACHE_TTL, REFERENCE_CACHE_MAXSIZE, FRAME_CACHE_MAX_MB, REPORT_MEMO_MAX_MB
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe cache with a per-entry time-to-live and LRU eviction.
+    Module-level instances are shared by every Streamlit session in the process.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, name: str = None):
+        """Drop every entry whose key starts with `name` (tuple keys), or everything."""
+        with self._lock:
+            if name is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k == name or (isinstance(k, tuple) and k and k[0] == name)]:
+                del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+REFERENCE_CACHE = TTLCache(maxsize=REFERENCE_CACHE_MAXSIZE, ttl=REFERENCE_CACHE_TTL)
+
+
+def invalidate_reference_cache(name: str = None):
+    """Manually drop cached reference data (all of it, or one kind such as "users")."""
+    REFERENCE_CACHE.invalidate(name)
+
+
+def estimate_nbytes(df: pd.DataFrame, sample: int = 1000) -> int:
+    """
+    Approximate deep memory use of a frame from a sample of its rows.
+    Categorical columns count their codes per row but their categories once.
+    """
+    if len(df) <= sample:
+        return int(df.memory_usage(deep=True).sum())
+    categorical = [i for i, dtype in enumerate(df.dtypes) if isinstance(dtype, pd.CategoricalDtype)]
+    plain = sorted(set(range(df.shape[1])) - set(categorical))
+    head = df.iloc[:sample, plain].memory_usage(deep=True, index=False).sum()
+    total = head * len(df) / sample
+    for i in categorical:
+        values = df.iloc[:, i].array
+        total += values.codes.nbytes + values.categories.memory_usage(deep=True)
+    return int(total)
+
+
+class FrameCache:
+    """
+    Memory-bounded LRU of decoded dataset frames, keyed by dataset id and
+    record-store version, shared by every session in the process. Only the
+    newest version of a dataset is kept. Readers get a shallow copy, so
+    adding columns to it never touches the cached frame.
+
+    A pinned snapshot (published by the background refresher) is exempt
+    from LRU eviction but counts against the same byte budget; it is
+    replaced as a whole, never edited in place.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # dataset_id -> (version, frame, nbytes)
+        self._bytes = 0
+        self._pinned = MappingProxyType({})  # dataset_id -> (version, frame)
+        self._pinned_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id: str, version: int) -> pd.DataFrame:
+        with self._lock:
+            entry = self._data.get(str(dataset_id))
+            if entry is not None and entry[0] == version:
+                self._data.move_to_end(str(dataset_id))
+                return entry[1].copy(deep=False)
+        pinned = self._pinned.get(str(dataset_id))
+        if pinned is not None and pinned[0] == version:
+            return pinned[1].copy(deep=False)
+        return None
+
+    def pin(self, frames: Dict[str, Tuple[int, pd.DataFrame]]):
+        """
+        Atomically replace the pinned snapshot with `{dataset_id: (version, frame)}`.
+        Frames are pinned in the given order while they fit the budget (the
+        rest stay ordinary LRU entries); LRU entries are evicted to make room.
+        """
+        pinned, total = {}, 0
+        for dataset_id, (version, frame) in frames.items():
+            nbytes = estimate_nbytes(frame)
+            if total + nbytes > self.max_bytes:
+                continue
+            pinned[str(dataset_id)] = (version, frame)
+            total += nbytes
+        with self._lock:
+            # A pinned frame serves its dataset; don't count it twice
+            for dataset_id in pinned:
+                self._pop(dataset_id)
+            self._pinned = MappingProxyType(pinned)
+            self._pinned_bytes = total
+            self._evict()
+
+    def put(self, dataset_id: str, version: int, frame: pd.DataFrame):
+        nbytes = estimate_nbytes(frame)
+        with self._lock:
+            self._pop(str(dataset_id))
+            if nbytes + self._pinned_bytes > self.max_bytes:
+                return
+            self._data[str(dataset_id)] = (version, frame, nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        while self._data and self._bytes + self._pinned_bytes > self.max_bytes:
+            self._pop(next(iter(self._data)))
+
+    def _pop(self, dataset_id: str):
+        entry = self._data.pop(dataset_id, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def invalidate(self, dataset_ids: Iterable[str] = None):
+        with self._lock:
+            if dataset_ids is None:
+                self._data.clear()
+                self._bytes = 0
+                return
+            for ds in dataset_ids:
+                self._pop(str(ds))
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes + self._pinned_bytes
+
+    def __len__(self):
+        return len(self._data)
+
+
+DATASET_FRAMES = FrameCache(max_bytes=FRAME_CACHE_MAX_MB * 1_000_000)
+
+
+def estimate_value_nbytes(value: Any) -> int:
+    """Approximate memory held by a cached result (frames, strings and tuples of them)."""
+    if isinstance(value, pd.DataFrame):
+        return estimate_nbytes(value)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_value_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _shallow(value: Any) -> Any:
+    """Hand out frames as shallow copies so callers can add columns without touching the cache."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(_shallow(v) for v in value)
+    return value
+
+
+class ResultCache:
+    """
+    Memory-bounded LRU of computed results keyed by a caller-supplied
+    fingerprint, shared by every session in the process. Results larger
+    than the whole budget are returned but not kept.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for `key`, computing and storing it on a miss (`key=None` never caches)."""
+        if key is None:
+            return compute()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                return _shallow(entry[0])
+
+        value = compute()
+        nbytes = estimate_value_nbytes(value)
+        with self._lock:
+            self._pop(key)
+            if nbytes <= self.max_bytes:
+                self._data[key] = (value, nbytes)
+                self._bytes += nbytes
+                while self._bytes > self.max_bytes:
+                    self._pop(next(iter(self._data)))
+        return _shallow(value)
+
+    def _pop(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def invalidate(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._data)
+
+
+REPORT_RESULTS = ResultCache(max_bytes=REPORT_MEMO_MAX_MB * 1_000_000)
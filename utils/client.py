@@ -0,0 +1,213 @@
+import hashlib
+import random
+import threading
+import time
+
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_POOL_SIZE,
+    API_RATE_LIMIT,
+    API_RATE_BURST,
+    API_CONCURRENCY_INITIAL,
+    API_CONCURRENCY_MIN,
+    API_CONCURRENCY_MAX,
+    API_LATENCY_TARGET,
+)
+from utils.throttle import AIMDLimiter, TokenBucket, parse_retry_after
+from utils.metrics import REQUEST_LOG
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Sent by the server without processing the request, so safe to replay for any method
+NOT_APPLIED_STATUS = {429, 503}
+
+
+class ApiClient:
+    """
+    Pooled HTTP client shared by every API helper in the process.
+    Keeps connections alive across calls, applies default connect/read
+    timeouts and retries transient failures with jittered exponential backoff.
+    Every attempt passes a shared token bucket and an adaptive concurrency
+    limit, and a Retry-After from the server pauses all callers.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_base: float = HTTP_BACKOFF_BASE,
+        backoff_max: float = HTTP_BACKOFF_MAX,
+        pool_size: int = HTTP_POOL_SIZE,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.bucket = TokenBucket(API_RATE_LIMIT, API_RATE_BURST)
+        self.limiter = AIMDLimiter(
+            initial=API_CONCURRENCY_INITIAL,
+            min_limit=API_CONCURRENCY_MIN,
+            max_limit=min(API_CONCURRENCY_MAX, pool_size),
+            latency_target=API_LATENCY_TARGET,
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (0-based) attempt."""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def _should_retry(self, method: str, status_code: int) -> bool:
+        if status_code not in RETRY_STATUS:
+            return False
+        # 429/503 mean the request was not processed, so they are safe to
+        # replay for any method; other 5xx only for idempotent methods.
+        return method in IDEMPOTENT_METHODS or status_code in NOT_APPLIED_STATUS
+
+    def request(self, method: str, url: str, timeout=None, retries: int = None, **kwargs) -> requests.Response:
+        """Send a request through the pooled session, retrying transient failures.
+
+        Every call is recorded in REQUEST_LOG with its endpoint template,
+        final status, total latency (including retries), bytes and retry count.
+        """
+        method = method.upper()
+        params = kwargs.get("params") or {}
+        started = time.monotonic()
+        response, state = None, {"attempt": 0}
+        try:
+            response = self._send(method, url, timeout, retries, kwargs, state)
+            return response
+        finally:
+            REQUEST_LOG.record(
+                method,
+                url,
+                status=response.status_code if response is not None else None,
+                latency=time.monotonic() - started,
+                nbytes=len(response.content) if response is not None and not kwargs.get("stream") else 0,
+                retries=state["attempt"],
+                page=params.get("page") if isinstance(params, dict) else None,
+            )
+
+    def _send(self, method: str, url: str, timeout, retries: int, kwargs, state: Dict):
+        """Retry loop behind request(); keeps the retry count in `state["attempt"]`."""
+        timeout = timeout or self.timeout
+        retries = self.max_retries if retries is None else retries
+        bodies = _file_bodies(kwargs)
+
+        while True:
+            attempt = state["attempt"]
+            for f, pos in bodies:
+                f.seek(pos)
+            self.bucket.acquire()
+            self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.limiter.release(time.monotonic() - started, ok=False)
+                # A non-idempotent call may already have been applied unless it never left
+                retryable = method in IDEMPOTENT_METHODS or never_sent(e)
+                if attempt >= retries or not retryable:
+                    raise
+                time.sleep(self._backoff(attempt))
+                state["attempt"] += 1
+                continue
+            except BaseException:
+                self.limiter.release(time.monotonic() - started, ok=True)
+                raise
+            self.limiter.release(time.monotonic() - started, ok=response.status_code not in RETRY_STATUS)
+
+            retry_after = None
+            if response.status_code in (429, 503):
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    # Hold back every caller, not just this one
+                    self.bucket.pause_for(min(retry_after, self.backoff_max))
+
+            if attempt < retries and self._should_retry(method, response.status_code):
+                response.close()
+                delay = self._backoff(attempt)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.backoff_max))
+                time.sleep(delay)
+                state["attempt"] += 1
+                continue
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+def never_sent(error: Exception) -> bool:
+    """True when a transport error happened before the request reached the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose `reason` is the underlying failure
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def not_applied(error: Exception = None, status_code: int = None) -> bool:
+    """
+    True when a failed call certainly had no effect on the server: it never
+    left (see never_sent) or was turned away with 429/503. Only then may a
+    caller resend a non-idempotent request on top of the client's own retries.
+    """
+    if error is not None:
+        return isinstance(error, requests.RequestException) and never_sent(error)
+    return status_code in NOT_APPLIED_STATUS
+
+
+def _file_bodies(kwargs):
+    """Collect (file, position) pairs for seekable bodies so retries can rewind them."""
+    candidates = [kwargs.get("data")]
+    files = kwargs.get("files") or {}
+    for value in (files.values() if isinstance(files, dict) else files):
+        candidates.append(value[1] if isinstance(value, (tuple, list)) else value)
+    return [(f, f.tell()) for f in candidates if hasattr(f, "seek") and hasattr(f, "tell")]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ApiClient:
+    """Return the process-wide ApiClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ApiClient()
+    return _client
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_client().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_client().post(url, **kwargs)
+
+
+def token_scope(token: str) -> str:
+    """Short, non-reversible identifier of a token for use in shared cache keys."""
+    return hashlib.sha256((token or "").encode()).hexdigest()[:16]
@@ -0,0 +1,93 @@
+import json
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.record_table import compact_records
+
+try:
+    import orjson  # optional, much faster page decoding
+except ImportError:
+    orjson = None
+
+
+def loads(raw: bytes):
+    """Parse a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(obj) -> str:
+    """Serialize to canonical (key-sorted) JSON text, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS, default=str).decode()
+    return json.dumps(obj, sort_keys=True, default=str)
+
+
+# A decoded page: (row count, {column: object ndarray})
+PageChunk = Tuple[int, Dict[str, np.ndarray]]
+
+
+def decode_page(records: List[Dict]) -> PageChunk:
+    """
+    Split one page of record dicts into per-column buffers.
+    Missing keys become NaN, exactly as pd.DataFrame(records) would fill them,
+    so the page dicts can be released as soon as this returns.
+    """
+    columns = {}
+    for r in records:
+        for key in r:
+            columns.setdefault(key, None)
+
+    chunk = {}
+    for key in columns:
+        values = np.empty(len(records), dtype=object)
+        values[:] = [r.get(key, np.nan) for r in records]
+        chunk[key] = values
+    return len(records), chunk
+
+
+class ColumnarFrameBuilder:
+    """
+    Collect decoded pages (in any arrival order) and build one DataFrame.
+    Columns keep first-seen order across pages and dtypes are inferred once
+    per column at the end, matching pd.DataFrame(list_of_dicts); repeated
+    short strings are then dictionary-encoded (see compact_records).
+    """
+
+    def __init__(self):
+        self._chunks = {}
+
+    def add(self, page: int, chunk: PageChunk):
+        self._chunks[page] = chunk
+
+    def truncate(self, first_missing_page: int):
+        """Drop every page from `first_missing_page` on (keep the contiguous prefix)."""
+        self._chunks = {p: c for p, c in self._chunks.items() if p < first_missing_page}
+
+    def __len__(self):
+        return sum(n for n, _ in self._chunks.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        chunks = [self._chunks[p] for p in sorted(self._chunks)]
+        self._chunks = {}
+        if not chunks:
+            return pd.DataFrame()
+
+        keys = list(dict.fromkeys(k for _, cols in chunks for k in cols))
+        data = {}
+        for key in keys:
+            # Pop each page's buffer as it is consumed to keep peak memory down
+            parts = [cols.pop(key, None) for _, cols in chunks]
+            parts = [p if p is not None else np.full(n, np.nan, dtype=object) for p, (n, _) in zip(parts, chunks)]
+            data[key] = pd.Series(np.concatenate(parts) if len(parts) > 1 else parts[0]).infer_objects()
+        return compact_records(pd.DataFrame(data))
+
+
+def chunk_to_frame(chunk: PageChunk) -> pd.DataFrame:
+    """Build a small DataFrame from a single decoded page."""
+    builder = ColumnarFrameBuilder()
+    builder.add(0, chunk)
+    return builder.to_frame()
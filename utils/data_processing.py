@@ -1,18 +1,47 @@
+import numpy as np
 import pandas as pd
 import zipfile
+import tempfile
 import io
+from config import ZIP_CHUNK_ROWS, ZIP_SPOOL_MAX_BYTES
 
-def csv_to_json_zip(df: pd.DataFrame) -> io.BytesIO:
-    """Convert DataFrame to zipped JSON."""
-    json_data = df.to_json(orient='records')
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as z:
-        z.writestr("data.json", json_data)
+def write_json_zip(df: pd.DataFrame, fileobj, chunk_rows: int = ZIP_CHUNK_ROWS):
+    """Write df as the JSON array `data.json` inside a zip, serializing chunk_rows rows at a time.
+
+    The member content is identical to df.to_json(orient='records'), but the
+    full JSON string never exists in memory.
+    """
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as z:
+        with z.open("data.json", "w", force_zip64=True) as member:
+            member.write(b"[")
+            first = True
+            for start in range(0, len(df), max(1, chunk_rows)):
+                body = df.iloc[start:start + chunk_rows].to_json(orient='records')[1:-1]
+                if not body:
+                    continue
+                if not first:
+                    member.write(b",")
+                member.write(body.encode("utf-8"))
+                first = False
+            member.write(b"]")
+
+def csv_to_json_zip(df: pd.DataFrame, spool: bool = False, chunk_rows: int = ZIP_CHUNK_ROWS):
+    """Convert DataFrame to zipped JSON.
+
+    With `spool=True` the zip is built in a SpooledTemporaryFile that moves to
+    disk past ZIP_SPOOL_MAX_BYTES, so large uploads don't need the archive in RAM.
+    """
+    zip_buffer = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_BYTES) if spool else io.BytesIO()
+    write_json_zip(df, zip_buffer, chunk_rows=chunk_rows)
     zip_buffer.seek(0)
     return zip_buffer
 
 def filter_undone_questions(data):
-    """Return items where status != completed."""
+    """Return items where status != completed (rows of a DataFrame, or a list of dicts)."""
+    if isinstance(data, pd.DataFrame):
+        if "status" not in data.columns:
+            return data
+        return data[data["status"] != "completed"]
     return [d for d in data if d.get("status") != "completed"]
 
 def assign_questions_by_capacity(questions, capacity_df):
@@ -44,4 +73,13 @@ def get_performance_tier(pass_rate):
     elif pass_rate <50:
         return 5
     else:
-        return 0
\ No newline at end of file
+        return 0
+
+def get_performance_tiers(pass_rates) -> np.ndarray:
+    """Vectorized get_performance_tier: same bins, 0 for NaN."""
+    rates = np.asarray(pass_rates, dtype=float)
+    return np.select(
+        [rates >= 90, rates >= 80, rates >= 70, rates >= 50, rates < 50],
+        [1, 2, 3, 4, 5],
+        default=0,
+    )
@@ -0,0 +1,279 @@
+"""
+Page-level fetch primitives for pipeline data.
+
+Nothing in here touches st.session_state or renders widgets, so these
+functions are safe to call from worker threads.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import pandas as pd
+
+from config import API_BASE_URL, PAGE_FETCH_WORKERS
+from utils import client
+from utils.columnar import ColumnarFrameBuilder, PageChunk, chunk_to_frame, decode_page, dumps, loads
+from utils.singleflight import PAGE_FLIGHTS
+
+
+class PageFetchError(Exception):
+    """Raised when a single data page cannot be fetched."""
+
+    def __init__(self, pipeline_run_id: str, page: int, message: str):
+        super().__init__(message)
+        self.pipeline_run_id = pipeline_run_id
+        self.page = page
+
+
+class PageResult:
+    """A fetched page, already decoded into column buffers."""
+
+    __slots__ = ("page", "total_pages", "total_rows", "chunk", "payloads")
+
+    def __init__(self, page: int, total_pages: int, total_rows: int, chunk: PageChunk, payloads: List[Tuple[str, str]] = None):
+        self.page = page
+        self.total_pages = total_pages
+        self.total_rows = total_rows
+        self.chunk = chunk
+        self.payloads = payloads
+
+
+def fetch_page(pipeline_run_id: str, page: int, headers: Dict) -> Dict:
+    """Fetch one page of `/pipeline/{id}/data` and return the decoded JSON body."""
+    response = client.get(
+        f"{API_BASE_URL}/api/v1/data_v2/pipeline/{pipeline_run_id}/data",
+        headers=headers,
+        params={"page": page},
+    )
+    if response.status_code != 200:
+        raise PageFetchError(pipeline_run_id, page, response.text)
+    return loads(response.content)
+
+
+def fetch_page_chunk(pipeline_run_id: str, page: int, headers: Dict, with_payloads: bool = False) -> PageResult:
+    """
+    Fetch one page and decode it into column buffers inside the worker, so
+    the page's record dicts are released before the result is handed back.
+    With `with_payloads`, also return (record_id, json) pairs for the record store.
+
+    Concurrent requests for the same page (same token scope) from any session
+    share one request; each caller gets its own PageResult over shared arrays.
+    """
+    key = (client.token_scope(headers.get("Authorization")), str(pipeline_run_id), page, with_payloads)
+    result, _ = PAGE_FLIGHTS.do(key, _fetch_page_chunk, pipeline_run_id, page, headers, with_payloads)
+    # Consumers pop columns from the chunk and drop fields, so never hand out the shared object
+    n, columns = result.chunk
+    return PageResult(result.page, result.total_pages, result.total_rows, (n, dict(columns)), result.payloads)
+
+
+def _fetch_page_chunk(pipeline_run_id: str, page: int, headers: Dict, with_payloads: bool) -> PageResult:
+    result = fetch_page(pipeline_run_id, page, headers)
+    records = result.get("data", [])
+    payloads = None
+    if with_payloads:
+        payloads = [(str(r.get("id", f"#{page}:{i}")), dumps(r)) for i, r in enumerate(records)]
+    return PageResult(
+        page=page,
+        total_pages=result.get("total_pages", 1) or 1,
+        total_rows=result.get("total_rows", 0),
+        chunk=decode_page(records),
+        payloads=payloads,
+    )
+
+
+def fetch_pages(
+    pipeline_run_id: str,
+    pages: Iterable[int],
+    headers: Dict,
+    max_workers: int = PAGE_FETCH_WORKERS,
+    on_page: Callable[[int, int], None] = None,
+) -> Tuple[Dict[int, PageChunk], Dict[int, str]]:
+    """
+    Fetch the given pages concurrently with at most `max_workers` in flight.
+
+    `on_page(done, total)` is called from the calling thread after each page
+    completes, so it may safely update Streamlit widgets.
+
+    Returns:
+        (chunks_by_page, errors_by_page)
+    """
+    pages = list(pages)
+    chunks_by_page, errors_by_page = {}, {}
+    if not pages:
+        return chunks_by_page, errors_by_page
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages)))) as pool:
+        futures = {pool.submit(fetch_page_chunk, pipeline_run_id, p, headers): p for p in pages}
+        for done, future in enumerate(as_completed(futures), start=1):
+            page = futures[future]
+            try:
+                chunks_by_page[page] = future.result().chunk
+            except Exception as e:
+                errors_by_page[page] = str(e)
+            if on_page:
+                on_page(done, len(pages))
+
+    return chunks_by_page, errors_by_page
+
+
+def iter_pipeline_pages(
+    pipeline_run_id: str,
+    headers: Dict,
+    max_workers: int = PAGE_FETCH_WORKERS,
+    ordered: bool = True,
+) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Yield `(page, chunk_df)` for every page of a pipeline run as soon as it arrives.
+
+    Page 1 is yielded first; the rest are fetched concurrently with at most
+    `max_workers` pages in flight, so a slow consumer never buffers the whole
+    run. With `ordered=True` pages are yielded in page order (out-of-order
+    arrivals wait in a small buffer), otherwise in arrival order.
+
+    A failed page raises PageFetchError when it is reached. Closing the
+    generator early (break, or fold_pages' `until`) cancels pending pages.
+    """
+    first = fetch_page_chunk(pipeline_run_id, 1, headers)
+    total_pages = first.total_pages
+    max_workers = max(1, max_workers)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    buffered = {}
+    next_page = 2
+
+    def refill():
+        # Pages waiting for an earlier one count against the window too
+        nonlocal next_page
+        while len(pending) + len(buffered) < 2 * max_workers and next_page <= total_pages:
+            pending[pool.submit(fetch_page_chunk, pipeline_run_id, next_page, headers)] = next_page
+            next_page += 1
+
+    try:
+        refill()
+        yield 1, chunk_to_frame(first.chunk)
+        first = None
+
+        expected = 2
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = pending.pop(future)
+                buffered[page] = future  # result() re-raises the page's error when reached
+
+            if not ordered:
+                for page in sorted(buffered):
+                    yield page, chunk_to_frame(buffered.pop(page).result().chunk)
+            while expected in buffered:
+                yield expected, chunk_to_frame(buffered.pop(expected).result().chunk)
+                expected += 1
+            refill()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fold_pages(
+    pages: Iterator[Tuple[int, pd.DataFrame]],
+    func: Callable[[Any, pd.DataFrame], Any],
+    initial: Any = None,
+    until: Callable[[Any], bool] = None,
+) -> Any:
+    """
+    Fold streamed page chunks into a result: `acc = func(acc, chunk_df)`.
+    Stops early, cancelling the remaining fetches, once `until(acc)` is true.
+    """
+    acc = initial
+    try:
+        for _, chunk in pages:
+            acc = func(acc, chunk)
+            if until is not None and until(acc):
+                break
+    finally:
+        if hasattr(pages, "close"):
+            pages.close()
+    return acc
+
+
+def fetch_datasets(
+    dataset_ids: Iterable[str],
+    headers: Dict,
+    max_workers: int = PAGE_FETCH_WORKERS,
+    on_progress: Callable[[int, int], None] = None,
+    on_payloads: Callable[[str, int, List[Tuple[str, str]]], None] = None,
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """
+    Fetch every page of several datasets from one shared, bounded worker pool.
+
+    Page 1 of every dataset is probed first to learn its size. The remaining
+    pages of all datasets are then queued largest dataset first, so the
+    biggest download starts earliest instead of finishing last.
+
+    `on_progress(done, total)` is called from the calling thread; `total`
+    grows once the probes have reported every dataset's page count. When
+    `on_payloads(dataset_id, page, payloads)` is given, workers also serialize
+    each record and the callback receives them (in the calling thread) before
+    they are released.
+
+    Returns:
+        (frame_by_dataset, errors_by_dataset)
+    """
+    dataset_ids = list(dict.fromkeys(dataset_ids))
+    builders = {ds: ColumnarFrameBuilder() for ds in dataset_ids}
+    total_pages = {}
+    errors = {}
+    if not dataset_ids:
+        return {}, errors
+    with_payloads = on_payloads is not None
+
+    def consume(ds, result: PageResult):
+        builders[ds].add(result.page, result.chunk)
+        if with_payloads:
+            on_payloads(ds, result.page, result.payloads)
+        # The future keeps a reference to the result; drop the heavy parts
+        result.chunk = result.payloads = None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        # --- Phase 1: probe page 1 of every dataset ---
+        total = len(dataset_ids)
+        done = 0
+        probes = {pool.submit(fetch_page_chunk, ds, 1, headers, with_payloads): ds for ds in dataset_ids}
+        for future in as_completed(probes):
+            ds = probes[future]
+            try:
+                result = future.result()
+                total_pages[ds] = result.total_pages
+                consume(ds, result)
+            except Exception as e:
+                errors[ds] = str(e)
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+        # --- Phase 2: drain remaining pages, largest datasets first ---
+        order = sorted(total_pages, key=lambda ds: total_pages[ds], reverse=True)
+        tasks = {}
+        for ds in order:
+            for page in range(2, total_pages[ds] + 1):
+                tasks[pool.submit(fetch_page_chunk, ds, page, headers, with_payloads)] = (ds, page)
+        total += len(tasks)
+
+        page_errors = {}
+        for future in as_completed(tasks):
+            ds, page = tasks[future]
+            try:
+                consume(ds, future.result())
+            except Exception as e:
+                page_errors.setdefault(ds, {})[page] = str(e)
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+    # Keep the contiguous run of pages before a dataset's first failed page
+    for ds, failed in page_errors.items():
+        first_failed = min(failed)
+        errors[ds] = f"page {first_failed}: {failed[first_failed]}"
+        builders[ds].truncate(first_failed)
+
+    frames = {}
+    for ds in dataset_ids:
+        if ds in total_pages:
+            frames[ds] = builders.pop(ds).to_frame()
+    return frames, errors
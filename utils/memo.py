@@ -0,0 +1,68 @@
+"""
+Memoization of report computations across Streamlit reruns.
+
+A records frame built by get_dataset_records carries the dataset ids and
+record-store versions it was assembled from (in its attrs). Those, plus
+the per-dataset labels, the session's user mapping and the config status
+lists / thresholds, identify its content without hashing any rows, so a
+widget change that leaves them alone reuses every result derived from it.
+"""
+import hashlib
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+from config import (
+    COMPLETED_STATUS,
+    INCOMPLETE_STATUS,
+    QA_STATUS,
+    QA_DONE_STATUS,
+    CYCLE_MIN_QA_SAMPLES,
+    CYCLE_MIN_PASS_COUNT,
+)
+from utils.cache import REPORT_RESULTS
+
+CONFIG_FINGERPRINT = (
+    tuple(COMPLETED_STATUS),
+    tuple(INCOMPLETE_STATUS),
+    tuple(QA_STATUS),
+    tuple(QA_DONE_STATUS),
+    CYCLE_MIN_QA_SAMPLES,
+    CYCLE_MIN_PASS_COUNT,
+)
+
+
+def _items(mapping: Dict) -> list:
+    return sorted(((str(k), v) for k, v in (mapping or {}).items()), key=lambda kv: kv[0])
+
+
+def frame_fingerprint(records: pd.DataFrame, user_data: Dict = None) -> Optional[str]:
+    """
+    Digest of what a records frame was built from, or None when it cannot be
+    identified that way (partial fetches, frames not from get_dataset_records).
+    """
+    versions = records.attrs.get("dataset_versions")
+    # attrs survive filtering, so only the full frame as built may use them
+    if not versions or records.attrs.get("rows") != len(records):
+        return None
+    columns = records.attrs.get("dataset_columns", {})
+    payload = repr((
+        _items(versions),
+        _items(records.attrs.get("dataset_names")),
+        sorted((c, _items(m)) for c, m in columns.items()),
+        list(records.columns),
+        _items(user_data),
+        CONFIG_FINGERPRINT,
+    ))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def memoize(records: pd.DataFrame, name: str, compute: Callable[[], Any], *args: Hashable, user_data: Dict = None) -> Any:
+    """
+    Return `compute()` for this records frame, reusing the result of an earlier
+    call with the same `name` and `args` on an identical frame. Frames without
+    a fingerprint are always recomputed.
+    """
+    fingerprint = frame_fingerprint(records, user_data)
+    key = None if fingerprint is None else (name, fingerprint, args)
+    return REPORT_RESULTS.get_or_compute(key, compute)
@@ -0,0 +1,87 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+from config import HTTP_METRICS_MAXLEN
+
+# Path segments that are ids rather than part of the route
+_ID_SEGMENT = re.compile(r"\d+|[0-9a-fA-F-]{8,}|[A-Za-z0-9]{16,}")
+
+
+def endpoint_template(url: str) -> str:
+    """Turn a concrete URL into its route template, e.g. `/api/v1/data_v2/pipeline/{id}/data`."""
+    path = urlparse(url).path
+    return "/".join("{id}" if _ID_SEGMENT.fullmatch(seg) else seg for seg in path.split("/"))
+
+
+class RequestLog:
+    """Thread-safe, bounded log of API requests made in this process."""
+
+    COLUMNS = ["ts", "method", "endpoint", "status", "latency", "bytes", "retries", "page"]
+
+    def __init__(self, maxlen: int = HTTP_METRICS_MAXLEN):
+        self._entries = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, method: str, url: str, status: int, latency: float,
+               nbytes: int, retries: int, page: int = None):
+        entry = (time.time(), method, endpoint_template(url), status, latency, nbytes, retries, page)
+        with self._lock:
+            self._entries.append(entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def to_frame(self) -> pd.DataFrame:
+        with self._lock:
+            entries = list(self._entries)
+        return pd.DataFrame(entries, columns=self.COLUMNS)
+
+    def summary(self) -> pd.DataFrame:
+        """Per-endpoint counts, errors, bytes, retries and latency percentiles (seconds)."""
+        df = self.to_frame()
+        if df.empty:
+            return pd.DataFrame()
+        rows = []
+        for (method, endpoint), g in df.groupby(["method", "endpoint"]):
+            latency = g["latency"].to_numpy()
+            p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+            rows.append({
+                "method": method,
+                "endpoint": endpoint,
+                "requests": len(g),
+                "errors": int((g["status"].isna() | (g["status"] >= 400)).sum()),
+                "retries": int(g["retries"].sum()),
+                "bytes": int(g["bytes"].sum()),
+                "total_time": round(latency.sum(), 3),
+                "p50": round(p50, 3),
+                "p95": round(p95, 3),
+                "p99": round(p99, 3),
+            })
+        return pd.DataFrame(rows).sort_values("total_time", ascending=False, ignore_index=True)
+
+    def histogram(self, endpoint: str, bins: int = 20) -> pd.DataFrame:
+        """Latency histogram for one endpoint template."""
+        df = self.to_frame()
+        latency = df.loc[df["endpoint"] == endpoint, "latency"].to_numpy()
+        if latency.size == 0:
+            return pd.DataFrame(columns=["latency", "count"])
+        counts, edges = np.histogram(latency, bins=bins)
+        return pd.DataFrame({"latency": np.round(edges[1:], 3), "count": counts})
+
+    def export(self, fmt: str = "json") -> str:
+        """Raw request log as JSON (records) or CSV text."""
+        df = self.to_frame()
+        if fmt == "csv":
+            return df.to_csv(index=False)
+        return json.dumps(json.loads(df.to_json(orient="records")), indent=2)
+
+
+REQUEST_LOG = RequestLog()
@@ -0,0 +1,90 @@
+import io
+import os
+import uuid
+from typing import Dict, Tuple, BinaryIO
+
+
+class MultipartStream(io.RawIOBase):
+    """
+    A multipart/form-data body that is read lazily from its parts.
+
+    File parts are streamed from their file objects instead of being copied
+    into one bytes buffer, and the total length is known up front so
+    requests sends a Content-Length rather than a chunked body. The stream
+    is seekable, so a retry can rewind it.
+    """
+
+    def __init__(self, fields: Dict[str, str], files: Dict[str, Tuple[str, BinaryIO, str]], boundary: str = None):
+        super().__init__()
+        self.boundary = boundary or uuid.uuid4().hex
+        self._parts = []  # list of (bytes | file, start offset in file, length)
+        for name, value in fields.items():
+            self._add_bytes(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, (filename, fileobj, content_type) in files.items():
+            self._add_bytes(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n".encode()
+            )
+            start = fileobj.tell()
+            size = fileobj.seek(0, os.SEEK_END) - start
+            fileobj.seek(start)
+            self._parts.append((fileobj, start, size))
+            self._add_bytes(b"\r\n")
+        self._add_bytes(f"--{self.boundary}--\r\n".encode())
+        self._length = sum(size for _, _, size in self._parts)
+        self._pos = 0
+
+    def _add_bytes(self, data: bytes):
+        self._parts.append((data, 0, len(data)))
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: self._length}[whence]
+        self._pos = max(0, min(self._length, base + offset))
+        return self._pos
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._length - self._pos
+        out = []
+        offset = 0
+        for part, start, length in self._parts:
+            if size <= 0:
+                break
+            if self._pos >= offset + length:
+                offset += length
+                continue
+            inner = self._pos - offset
+            take = min(length - inner, size)
+            if isinstance(part, bytes):
+                chunk = part[inner:inner + take]
+            else:
+                part.seek(start + inner)
+                chunk = part.read(take)
+            out.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+            offset += length
+        return b"".join(out)
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
@@ -0,0 +1,75 @@
+"""
+Ingest normalization for dataset records.
+
+Low-cardinality text fields are canonicalized once per distinct value and
+dictionary-encoded as pandas Categoricals, so later reports, samplers and
+cycle builders compare small integer codes instead of re-lowercasing
+millions of Python strings.
+"""
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from config import COMPLETED_STATUS, INCOMPLETE_STATUS, QA_STATUS, QA_DONE_STATUS
+
+UNKNOWN_ASSIGNEE = "Unknown"
+STATUS_VOCABULARY = list(dict.fromkeys(INCOMPLETE_STATUS + COMPLETED_STATUS + QA_STATUS + QA_DONE_STATUS))
+QA_FLAG_VOCABULARY = ["pass", "fail"]
+
+# column -> (lowercase?, known vocabulary always present in the categories)
+CATEGORICAL_FIELDS = {
+    "status": (True, STATUS_VOCABULARY),
+    "qa_flag": (True, QA_FLAG_VOCABULARY),
+    "assignee_name": (False, None),
+    "dataset_name": (False, None),
+    "project_name": (False, None),
+    "domain": (False, None),
+    "task": (False, None),
+}
+
+
+def to_category(series: pd.Series, lower: bool = False, vocabulary: List[str] = None) -> pd.Series:
+    """
+    Strip (and optionally lowercase) each distinct value once and return the
+    column as a Categorical. Values that canonicalize to the same text share
+    one category; missing values stay missing.
+    """
+    codes, uniques = pd.factorize(series)
+    canonical = pd.Index(uniques, dtype=object).map(lambda v: v if isinstance(v, str) else str(v)).str.strip()
+    if lower:
+        canonical = canonical.str.lower()
+    # Sorted categories keep groupby/sort order identical to plain strings
+    categories = pd.Index(sorted(set(vocabulary or []) | set(canonical)), dtype=object)
+    mapping = np.append(categories.get_indexer(canonical), -1)
+    return pd.Series(pd.Categorical.from_codes(mapping[codes], categories), index=series.index, name=series.name)
+
+
+def normalize_records(df: pd.DataFrame, columns: Iterable[str] = None) -> pd.DataFrame:
+    """Dictionary-encode the CATEGORICAL_FIELDS present in `df` (in place) and return it."""
+    for column in columns or CATEGORICAL_FIELDS:
+        if column in df.columns:
+            lower, vocabulary = CATEGORICAL_FIELDS.get(column, (False, None))
+            df[column] = to_category(df[column], lower=lower, vocabulary=vocabulary)
+    return df
+
+
+def resolve_assignee_names(assignee: pd.Series, user_data: Dict[str, str]) -> pd.Series:
+    """
+    Map assignee ids to usernames with one indexed lookup (`user_data` is
+    username -> id, as kept in the session). Unmatched or missing ids become
+    "Unknown"; if several usernames share an id the last one wins.
+    """
+    names = pd.Index(list(user_data.keys()), dtype=object)
+    ids = pd.Index(list(user_data.values()), dtype=object)
+    keep = ~ids.duplicated(keep="last")
+    ids, names = ids[keep], names[keep]
+
+    categories = pd.Index(sorted(set(names) | {UNKNOWN_ASSIGNEE}), dtype=object)
+    name_codes = np.append(categories.get_indexer(names), categories.get_loc(UNKNOWN_ASSIGNEE))
+    positions = ids.get_indexer(pd.Index(assignee, dtype=object)) if len(ids) else np.full(len(assignee), -1)
+    return pd.Series(
+        pd.Categorical.from_codes(name_codes[positions], categories),
+        index=assignee.index,
+        name="assignee_name",
+    )
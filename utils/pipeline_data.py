@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 from utils.api import get_pipeline_runs, get_pipeline_data
 
 def query_pipeline_data(selected_run_id: str = None):
@@ -43,15 +42,14 @@ def query_pipeline_data(selected_run_id: str = None):
         "queried_data" not in st.session_state
     ):
         with st.spinner(f"Fetching data for run ID: {selected_run_id}..."):
-            data = get_pipeline_data(selected_run_id)
+            df = get_pipeline_data(selected_run_id)
 
-        if not data:
+        if df.empty:
             st.warning("No data found for this pipeline run.")
             st.session_state.queried_data = None
             st.session_state.current_run_id = None
             return None, run_options, selected_run_id
 
-        df = pd.DataFrame(data)
         st.session_state.queried_data = df
         st.session_state.current_run_id = selected_run_id
 
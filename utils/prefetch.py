@@ -0,0 +1,206 @@
+"""
+Speculative prefetch of project listings and dataset records.
+
+Work runs on a small background pool shared by every session and only fills
+process-wide caches (REFERENCE_CACHE for the project listing, the record
+store and DATASET_FRAMES for records), so nothing here touches Streamlit.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List
+
+from config import (
+    API_BASE_URL,
+    PREFETCH_COOLDOWN,
+    PREFETCH_WORKERS,
+    PREFETCH_PAGE_WORKERS,
+    PROJECT_CACHE_TTL,
+    RECENT_PROJECTS_PATH,
+)
+from utils import client
+from utils.cache import REFERENCE_CACHE
+from utils.record_store import get_record_store
+from utils.sync import sync_datasets
+
+
+def project_datasets(project: Dict) -> List[Dict]:
+    """Flatten a `/projects/{id}` body into one dict per dataset."""
+    return [
+        {
+            "project_id": project.get("id"),
+            "project_name": project.get("name"),
+            "dataset_id": ds.get("id"),
+            "dataset_name": ds.get("run_name"),  # use run_name since dataset_name not in JSON
+            "run_id": ds.get("run_id"),
+            "dataset_status": ds.get("status"),
+            "updated_at": ds.get("updated_at"),
+            "modality": ds.get("modality"),
+            "created_at": ds.get("created_at"),
+            "total_rows": ds.get("total_rows", ds.get("row_count")),
+        }
+        for ds in project.get("datasets", [])
+    ]
+
+
+def fetch_project(project_id: str, headers: Dict, token: str, force: bool = False):
+    """GET `/projects/{id}` through REFERENCE_CACHE (short TTL). Returns (project, response).
+
+    With `force` the cached listing is bypassed and replaced.
+    """
+    key = ("project", str(project_id), client.token_scope(token))
+    project = None if force else REFERENCE_CACHE.get(key)
+    if project is not None:
+        return project, None
+    response = client.get(f"{API_BASE_URL}/api/v1/projects/{project_id}", headers=headers)
+    if response.status_code != 200:
+        return None, response
+    project = response.json()
+    REFERENCE_CACHE.set(key, project, ttl=PROJECT_CACHE_TTL)
+    return project, response
+
+
+def project_metas(project: Dict) -> Dict[str, Dict]:
+    """Sync metadata (as kept by remember_dataset_meta) for every usable dataset of a project."""
+    return {
+        str(d["dataset_id"]): {
+            "id": d["dataset_id"],
+            "run_name": d["dataset_name"],
+            "run_id": d["run_id"],
+            "status": d["dataset_status"],
+            "updated_at": d["updated_at"],
+            "total_rows": d["total_rows"],
+        }
+        for d in project_datasets(project)
+        if d["dataset_id"] is not None and d["run_id"]
+    }
+
+
+def warm_project(project_id: str, token: str, max_workers: int = PREFETCH_PAGE_WORKERS) -> int:
+    """
+    Load a project's listing and sync those of its datasets whose stored copy
+    is stale; returns how many were synced (fresh ones are not even read back).
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    project, _ = fetch_project(project_id, headers, token)
+    if not project:
+        return 0
+    metas = project_metas(project)
+    store = get_record_store()
+    stale = [ds for ds, meta in metas.items() if not store.is_fresh(ds, meta)]
+    if stale:
+        sync_datasets(stale, metas, headers, max_workers=max_workers)
+    return len(stale)
+
+
+class Prefetcher:
+    """
+    Runs warm_project jobs in the background, at most one per (token scope,
+    project) at a time, and skips projects warmed within PREFETCH_COOLDOWN
+    (Streamlit reruns the page on every click).
+    """
+
+    def __init__(self, max_workers: int = PREFETCH_WORKERS, cooldown: float = PREFETCH_COOLDOWN):
+        self.cooldown = cooldown
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prefetch")
+        self._jobs = {}      # (scope, project_id) -> future
+        self._warmed = {}    # (scope, project_id) -> monotonic time of completion
+        self._lock = threading.Lock()
+
+    def submit(self, project_ids: Iterable[str], token: str):
+        """Start warming the given projects unless already running or recently done."""
+        if not token:
+            return
+        scope = client.token_scope(token)
+        now = time.monotonic()
+        with self._lock:
+            for project_id in project_ids:
+                key = (scope, str(project_id))
+                job = self._jobs.get(key)
+                if job is not None and not job.done():
+                    continue
+                if now - self._warmed.get(key, float("-inf")) < self.cooldown:
+                    continue
+                future = self._pool.submit(warm_project, project_id, token)
+                future.add_done_callback(lambda f, key=key: self._finished(key, f))
+                self._jobs[key] = future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._jobs.get(key) is future:
+                del self._jobs[key]
+            if not future.cancelled() and future.exception() is None:
+                self._warmed[key] = time.monotonic()
+
+    def wait(self, project_ids: Iterable[str], token: str, timeout: float = None) -> bool:
+        """Block until in-flight prefetches of these projects finish; True if none is left running."""
+        scope = client.token_scope(token)
+        with self._lock:
+            pending = [self._jobs[k] for k in ((scope, str(p)) for p in project_ids) if k in self._jobs]
+        if not pending:
+            return True
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def running(self) -> int:
+        with self._lock:
+            return sum(1 for f in self._jobs.values() if not f.done())
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """Return the process-wide Prefetcher, creating it on first use."""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher()
+    return _prefetcher
+
+
+# --- recently used projects (per token scope, persisted across restarts) ---
+
+_recent_lock = threading.Lock()
+
+
+def recent_projects(limit: int = None, scope: str = None, path: str = RECENT_PROJECTS_PATH) -> List[str]:
+    """Project ids most recently used in reports by `scope` (a token scope; None for everyone), newest first."""
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if scope is not None:
+        entries = [e for e in entries if e.get("scope") == scope]
+    ids = [e["project_id"] for e in sorted(entries, key=lambda e: e.get("used_at", 0), reverse=True)]
+    ids = list(dict.fromkeys(ids))
+    return ids[:limit] if limit else ids
+
+
+def remember_projects(project_ids: Iterable[str], scope: str = None, path: str = RECENT_PROJECTS_PATH,
+                      keep: int = 500):
+    """Record the projects as just used by `scope`; the file is replaced atomically."""
+    now = time.time()
+    with _recent_lock:
+        try:
+            with open(path) as f:
+                entries = {(e.get("scope"), e["project_id"]): e for e in json.load(f)}
+        except (OSError, ValueError):
+            entries = {}
+        for project_id in project_ids:
+            entry = entries.setdefault(
+                (scope, str(project_id)), {"project_id": str(project_id), "scope": scope, "uses": 0}
+            )
+            entry["uses"] += 1
+            entry["used_at"] = now
+        kept = sorted(entries.values(), key=lambda e: e["used_at"], reverse=True)[:keep]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(kept, f)
+        os.replace(tmp, path)
@@ -0,0 +1,228 @@
+"""
+Annotator QA quality cycles.
+
+Each annotator's datasets are walked in date order and grouped into cycles
+that close once they hold at least `min_qa_samples_per_cycle` QA'd items.
+Pass/fail counts are taken once per (annotator, dataset); cycle boundaries
+are then found by binary search over running totals, so the work per
+threshold is proportional to the number of cycles, not the number of rows.
+"""
+import re
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processing import get_performance_tiers
+from utils.report_engine import match_values
+
+DATE_PATTERN = r"(20\d{6})"  # e.g. 20251116
+REWORK_MIN_ACCURACY = 60
+
+
+def extract_date_from_dataset(dataset_name: str):
+    """Extract date from dataset_name."""
+    if not isinstance(dataset_name, str):
+        return None
+    m = re.search(DATE_PATTERN, dataset_name)
+    return pd.to_datetime(m.group(1), format="%Y%m%d") if m else None
+
+
+def dataset_qa_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (assignee_name, dataset_name) with its `pass`/`fail`/`qa`
+    counts, ordered by annotator, then dataset date (undated last), then name.
+    Rows without an annotator or dataset name are ignored.
+    """
+    zeros = np.zeros(len(df), dtype=np.int64)
+    flags = df["qa_flag"] if "qa_flag" in df.columns else None
+    counts = pd.DataFrame({
+        "assignee_name": df["assignee_name"],
+        "dataset_name": df["dataset_name"],
+        "pass": match_values(flags, ["pass"]).astype(np.int64) if flags is not None else zeros,
+        "fail": match_values(flags, ["fail"]).astype(np.int64) if flags is not None else zeros,
+    }).groupby(["assignee_name", "dataset_name"], observed=True, sort=True).sum().reset_index()
+    counts["qa"] = counts["pass"] + counts["fail"]
+
+    # Parse each distinct dataset name once
+    codes, uniques = pd.factorize(counts["dataset_name"])
+    dates = pd.to_datetime(pd.Series([extract_date_from_dataset(name) for name in uniques], dtype=object))
+    counts["dataset_date"] = dates.to_numpy()[codes] if len(codes) else pd.Series([], dtype="datetime64[ns]")
+
+    counts = counts.sort_values(["assignee_name", "dataset_date"], kind="stable", na_position="last")
+    return counts.reset_index(drop=True)
+
+
+def annotator_spans(counts: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """(start, end) row offsets of each annotator's contiguous block in `counts`."""
+    codes, _ = pd.factorize(counts["assignee_name"])
+    if not len(codes):
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return starts, np.r_[starts[1:], len(codes)]
+
+
+def cycle_bounds(cum_qa: np.ndarray, starts: np.ndarray, ends: np.ndarray, min_qa: int):
+    """
+    Greedy cycle segmentation for every annotator at once.
+
+    `cum_qa` is the running QA total over all rows (a leading 0 included);
+    a cycle starting at row s closes at the first row k >= s whose total
+    since s reaches `min_qa`.
+
+    Returns:
+        (annotator, first_row, last_row) arrays of the closed cycles in
+        (annotator, position) order, and the first row of each annotator's
+        unfinished remainder (== its end when nothing is left over).
+    """
+    pos = starts.copy()
+    active = np.arange(len(starts))
+    owners, firsts, lasts = [], [], []
+    while active.size:
+        s = pos[active]
+        k = np.maximum(np.searchsorted(cum_qa, cum_qa[s] + min_qa, side="left") - 1, s)
+        closed = k < ends[active]
+        owners.append(active[closed])
+        firsts.append(s[closed])
+        lasts.append(k[closed])
+        pos[active[closed]] = k[closed] + 1
+        active = active[closed & (k + 1 < ends[active])]
+
+    owners, firsts, lasts = (np.concatenate(a) if a else np.array([], dtype=np.int64) for a in (owners, firsts, lasts))
+    order = np.lexsort((firsts, owners))
+    return (owners[order], firsts[order], lasts[order]), pos
+
+
+def cycle_prefix(counts: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Running QA / pass totals (leading 0 included) and annotator spans of dataset_qa_counts output."""
+    cum_qa = np.r_[0, np.cumsum(counts["qa"].to_numpy())]
+    cum_pass = np.r_[0, np.cumsum(counts["pass"].to_numpy())]
+    starts, ends = annotator_spans(counts)
+    return cum_qa, cum_pass, starts, ends
+
+
+def _segment(cum_qa, cum_pass, starts, ends, min_qa: int):
+    """Closed plus trailing incomplete cycles, with their totals, in (annotator, position) order."""
+    (owners, firsts, lasts), rest = cycle_bounds(cum_qa, starts, ends, min_qa)
+
+    # A remainder with some QA becomes a trailing incomplete cycle; one with none is dropped
+    partial = np.flatnonzero((rest < ends) & (cum_qa[ends] > cum_qa[rest]))
+    incomplete = np.r_[np.zeros(len(owners), dtype=bool), np.ones(len(partial), dtype=bool)]
+    owners = np.r_[owners, partial]
+    firsts = np.r_[firsts, rest[partial]]
+    lasts = np.r_[lasts, ends[partial] - 1]
+    order = np.lexsort((firsts, owners))
+    owners, firsts, lasts, incomplete = owners[order], firsts[order], lasts[order], incomplete[order]
+
+    total = cum_qa[lasts + 1] - cum_qa[firsts]
+    passed = cum_pass[lasts + 1] - cum_pass[firsts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accuracy = np.where(total > 0, passed / total * 100, 0.0)
+    return owners, firsts, lasts, incomplete, total, passed, accuracy
+
+
+def segment_cycles(counts: pd.DataFrame, min_qa_samples_per_cycle: int, min_pass_count_per_cycle: int):
+    """Build (df_cycles, df_rework) from dataset_qa_counts output."""
+    if counts.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    cum_qa, cum_pass, starts, ends = cycle_prefix(counts)
+    owners, firsts, lasts, incomplete, total, passed, accuracy = _segment(
+        cum_qa, cum_pass, starts, ends, min_qa_samples_per_cycle
+    )
+    rounded = np.round(accuracy, 2)
+    cycle_id = np.arange(len(owners)) - np.searchsorted(owners, owners, side="left") + 1
+
+    annotators = counts["assignee_name"].to_numpy(dtype=object)[starts]
+    names = counts["dataset_name"].to_numpy(dtype=object)
+    df_cycles = pd.DataFrame({
+        "assignee_name": annotators[owners],
+        "cycle_id": cycle_id,
+        "cycle_total_qa": total,
+        "cycle_pass": passed,
+        "cycle_fail": total - passed,
+        "cycle_accuracy": rounded,
+        "performance_tier": get_performance_tiers(accuracy),
+        "datasets_in_cycle": [names[a:b + 1].tolist() for a, b in zip(firsts, lasts)],
+    })
+    if incomplete.any():
+        df_cycles["is_incomplete_cycle"] = [True if x else np.nan for x in incomplete]
+
+    # --- REWORK: every dataset of a closed cycle with too few passes or low accuracy ---
+    low_pass = passed < min_pass_count_per_cycle
+    flagged = np.flatnonzero(~incomplete & (low_pass | (accuracy < REWORK_MIN_ACCURACY)))
+    if not flagged.size:
+        return df_cycles, pd.DataFrame()
+    sizes = lasts[flagged] - firsts[flagged] + 1
+    cycle_rows = np.repeat(flagged, sizes)
+    dataset_rows = firsts[cycle_rows] + np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    df_rework = pd.DataFrame({
+        "assignee_name": annotators[owners[cycle_rows]],
+        "cycle_id": cycle_id[cycle_rows],
+        "dataset_name": names[dataset_rows],
+        "reason": np.where(low_pass[cycle_rows], "LOW_PASS_COUNT", "LOW_ACCURACY").astype(object),
+        "cycle_accuracy": rounded[cycle_rows],
+        "cycle_pass": passed[cycle_rows],
+        "cycle_total_qa": total[cycle_rows],
+    })
+    return df_cycles, df_rework
+
+
+def threshold_range(spec: str) -> List[int]:
+    """Parse "start:stop:step" (stop inclusive) or "a,b,c" into a list of thresholds."""
+    spec = str(spec).strip()
+    if ":" in spec:
+        start, stop, *step = (int(v) for v in spec.split(":"))
+        return list(range(start, stop + 1, step[0] if step else 1))
+    return [int(v) for v in spec.split(",") if v.strip()]
+
+
+def sweep_thresholds(counts: pd.DataFrame, min_qa_values: Iterable[int], min_pass_values: Iterable[int]) -> pd.DataFrame:
+    """
+    Evaluate every (min_qa, min_pass) pair from dataset_qa_counts output.
+
+    Cycles are segmented once per `min_qa` over the shared prefix sums; all
+    `min_pass` values are then checked against those cycles together.
+
+    Returns one row per pair: cycles, incomplete_cycles, flagged_cycles,
+    flagged_datasets (= rows of df_rework), flagged_annotators and tier_1..tier_5
+    (cycle counts per performance tier, incomplete cycles included).
+    """
+    min_qa_values = sorted(set(int(v) for v in min_qa_values))
+    pass_values = np.array(sorted(set(int(v) for v in min_pass_values)), dtype=np.int64)
+    prefix = cycle_prefix(counts)
+    rows = []
+    for min_qa in min_qa_values:
+        owners, firsts, lasts, incomplete, total, passed, accuracy = _segment(*prefix, min_qa)
+        sizes = lasts - firsts + 1
+        tiers = np.bincount(get_performance_tiers(accuracy), minlength=6)
+        # flagged[i, j]: closed cycle i needs rework at pass_values[j]
+        flagged = ~incomplete[:, None] & (
+            (passed[:, None] < pass_values[None, :]) | (accuracy < REWORK_MIN_ACCURACY)[:, None]
+        )
+        flagged_cycles = flagged.sum(axis=0)
+        flagged_datasets = (flagged * sizes[:, None]).sum(axis=0)
+        for j, min_pass in enumerate(pass_values):
+            rows.append({
+                "min_qa_samples_per_cycle": min_qa,
+                "min_pass_count_per_cycle": int(min_pass),
+                "cycles": len(owners),
+                "incomplete_cycles": int(incomplete.sum()),
+                "flagged_cycles": int(flagged_cycles[j]),
+                "flagged_datasets": int(flagged_datasets[j]),
+                "flagged_annotators": len(np.unique(owners[flagged[:, j]])),
+                **{f"tier_{t}": int(tiers[t]) for t in range(1, 6)},
+            })
+    return pd.DataFrame(rows)
+
+
+def build_annotator_quality_cycles(
+    df: pd.DataFrame,
+    min_qa_samples_per_cycle: int = 30,
+    min_pass_count_per_cycle: int = 20,
+):
+    """
+    Build cycle-based QA quality report per annotator.
+    Each cycle ends when QA-completed count >= min_qa_samples_per_cycle.
+    """
+    return segment_cycles(dataset_qa_counts(df), min_qa_samples_per_cycle, min_pass_count_per_cycle)
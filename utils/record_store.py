@@ -0,0 +1,285 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Set, Tuple
+
+import pandas as pd
+
+from config import RECORD_STORE_PATH, CLOSED_DATASET_STATUS, STAGING_MAX_AGE_SECONDS
+from utils.columnar import ColumnarFrameBuilder, decode_page, loads
+
+LOAD_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    total_rows INTEGER,
+    updated_at TEXT,
+    status TEXT,
+    stale INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS records (
+    dataset_id TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (dataset_id, record_id)
+);
+CREATE TABLE IF NOT EXISTS staged_records (
+    sync_id TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    staged_at REAL NOT NULL,
+    PRIMARY KEY (sync_id, position)
+);
+CREATE INDEX IF NOT EXISTS staged_records_id ON staged_records (sync_id, record_id);
+"""
+
+
+class RecordStore:
+    """
+    On-disk store of pipeline records keyed by dataset id (SQLite).
+    Each dataset carries a version that is bumped only when a save
+    actually changes, adds or removes records.
+    """
+
+    def __init__(self, path: str = RECORD_STORE_PATH, staging_max_age: float = STAGING_MAX_AGE_SECONDS):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        # Other processes may be syncing into the same store, so only drop
+        # what an interrupted sync left behind
+        self.discard_abandoned(staging_max_age)
+        self._drop_legacy_staging()
+
+    def discard_abandoned(self, max_age: float = STAGING_MAX_AGE_SECONDS):
+        """Delete the staged pages of every sync that has staged nothing for `max_age` seconds."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "DELETE FROM staged_records WHERE sync_id IN ("
+                "  SELECT sync_id FROM staged_records GROUP BY sync_id HAVING MAX(staged_at) < ?"
+                ")",
+                (time.time() - max_age,),
+            )
+
+    def _drop_legacy_staging(self):
+        """Drop the pre-`staged_records` staging table once no older process has rows in it."""
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'staging'"
+            ).fetchone()
+            if exists and conn.execute("SELECT 1 FROM staging LIMIT 1").fetchone() is None:
+                conn.execute("DROP TABLE staging")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_state(self, dataset_id: str) -> Dict:
+        """Return the stored sync state for a dataset, or None if never synced."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, total_rows, updated_at, status, stale, synced_at "
+                "FROM datasets WHERE dataset_id = ?",
+                (str(dataset_id),),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ["version", "total_rows", "updated_at", "status", "stale", "synced_at"]
+        return dict(zip(keys, row))
+
+    def is_fresh(self, dataset_id: str, meta: Dict) -> bool:
+        """
+        Decide from metadata alone whether the stored copy can be used without
+        refetching. The row count (when exposed) must match, and whenever the
+        metadata carries `updated_at` the stored one must be at least as new
+        (the background refresher may already have synced a newer copy than
+        the caller's metadata describes). Only without `updated_at` are closed
+        datasets trusted on their status alone.
+        """
+        state = self.get_state(dataset_id)
+        if state is None or state["stale"]:
+            return False
+        meta = meta or {}
+        if meta.get("total_rows") is not None and meta["total_rows"] != state["total_rows"]:
+            return False
+        if meta.get("updated_at") is not None:
+            # ISO-8601 timestamps from the same API compare correctly as strings
+            return state["updated_at"] is not None and str(meta["updated_at"]) <= state["updated_at"]
+        return str(meta.get("status") or "").lower() in CLOSED_DATASET_STATUS
+
+    def load_frame(self, dataset_id: str) -> pd.DataFrame:
+        """Load a dataset's stored records as one DataFrame, decoding in batches."""
+        builder = ColumnarFrameBuilder()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT payload FROM records WHERE dataset_id = ? ORDER BY position",
+                (str(dataset_id),),
+            )
+            batch_no = 0
+            while True:
+                rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                if not rows:
+                    break
+                builder.add(batch_no, decode_page([loads(payload) for (payload,) in rows]))
+                batch_no += 1
+        return builder.to_frame()
+
+    def load_records(self, dataset_id: str, record_ids: Iterable[str]) -> Tuple[List[str], pd.DataFrame]:
+        """
+        Load only the given records of a dataset (ids that are not stored are
+        skipped). Returns the found record ids and a frame in the same order.
+        """
+        record_ids = list(record_ids)
+        found, payloads = [], []
+        with self._connect() as conn:
+            for i in range(0, len(record_ids), 500):
+                batch = record_ids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT record_id, payload FROM records WHERE dataset_id = ? "
+                    f"AND record_id IN ({','.join('?' * len(batch))})",
+                    (str(dataset_id), *batch),
+                ).fetchall()
+                for rid, payload in rows:
+                    found.append(rid)
+                    payloads.append(loads(payload))
+        builder = ColumnarFrameBuilder()
+        builder.add(0, decode_page(payloads))
+        return found, builder.to_frame()
+
+    def begin_sync(self, dataset_id: str) -> str:
+        """Open a staging area for a full refetch of a dataset and return its sync id."""
+        return f"{dataset_id}:{uuid.uuid4().hex}"
+
+    def stage_page(self, sync_id: str, page: int, payloads: List[Tuple[str, str]]):
+        """Stage one fetched page of (record_id, json) pairs, every row kept (ids may repeat)."""
+        base = page * 1_000_000
+        staged_at = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO staged_records (sync_id, record_id, position, payload, staged_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((sync_id, rid, base + i, payload, staged_at) for i, (rid, payload) in enumerate(payloads)),
+            )
+
+    def discard_sync(self, sync_id: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM staged_records WHERE sync_id = ?", (sync_id,))
+
+    def commit_sync(self, sync_id: str, dataset_id: str, meta: Dict = None) -> Tuple[int, Set[str]]:
+        """
+        Merge a completed staging area into the dataset: write only records whose
+        payload changed, delete records that disappeared, and bump the version
+        if anything changed.
+
+        Returns:
+            (version, changed_record_ids)
+        """
+        dataset_id = str(dataset_id)
+        meta = meta or {}
+        with self._lock, self._connect() as conn:
+            # Repeated record ids keep their first row's id; later rows are stored
+            # under "<id>#<position>" so the stored frame matches what was fetched
+            repeated = conn.execute(
+                "SELECT s.position FROM staged_records s JOIN ("
+                "  SELECT record_id, MIN(position) AS first FROM staged_records WHERE sync_id = ? "
+                "  GROUP BY record_id HAVING COUNT(*) > 1"
+                ") d ON s.record_id = d.record_id AND s.position > d.first "
+                "WHERE s.sync_id = ?",
+                (sync_id, sync_id),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE staged_records SET record_id = record_id || '#' || position WHERE sync_id = ? AND position = ?",
+                ((sync_id, position) for (position,) in repeated),
+            )
+            changed = {rid for (rid,) in conn.execute(
+                "SELECT s.record_id FROM staged_records s "
+                "LEFT JOIN records r ON r.dataset_id = ? AND r.record_id = s.record_id "
+                "WHERE s.sync_id = ? AND (r.payload IS NULL OR r.payload != s.payload)",
+                (dataset_id, sync_id),
+            )}
+            removed = {rid for (rid,) in conn.execute(
+                "SELECT r.record_id FROM records r WHERE r.dataset_id = ? AND NOT EXISTS "
+                "(SELECT 1 FROM staged_records s WHERE s.sync_id = ? AND s.record_id = r.record_id)",
+                (dataset_id, sync_id),
+            )}
+
+            conn.execute(
+                "INSERT OR REPLACE INTO records (dataset_id, record_id, position, payload) "
+                "SELECT ?, s.record_id, s.position, s.payload FROM staged_records s "
+                "LEFT JOIN records r ON r.dataset_id = ? AND r.record_id = s.record_id "
+                "WHERE s.sync_id = ? AND (r.payload IS NULL OR r.payload != s.payload)",
+                (dataset_id, dataset_id, sync_id),
+            )
+            conn.executemany(
+                "DELETE FROM records WHERE dataset_id = ? AND record_id = ?",
+                ((dataset_id, rid) for rid in removed),
+            )
+            # Unchanged records keep their payload but may have moved between pages
+            conn.execute(
+                "UPDATE records SET position = ("
+                "  SELECT s.position FROM staged_records s WHERE s.sync_id = ? AND s.record_id = records.record_id"
+                ") WHERE dataset_id = ? AND position != ("
+                "  SELECT s.position FROM staged_records s WHERE s.sync_id = ? AND s.record_id = records.record_id"
+                ")",
+                (sync_id, dataset_id, sync_id),
+            )
+            total_rows = conn.execute(
+                "SELECT COUNT(*) FROM staged_records WHERE sync_id = ?", (sync_id,)
+            ).fetchone()[0]
+            conn.execute("DELETE FROM staged_records WHERE sync_id = ?", (sync_id,))
+
+            row = conn.execute("SELECT version FROM datasets WHERE dataset_id = ?", (dataset_id,)).fetchone()
+            version = (row[0] if row else 0) + (1 if changed or removed or row is None else 0)
+            conn.execute(
+                "INSERT OR REPLACE INTO datasets "
+                "(dataset_id, version, total_rows, updated_at, status, stale, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (
+                    dataset_id,
+                    version,
+                    total_rows,
+                    None if meta.get("updated_at") is None else str(meta["updated_at"]),
+                    meta.get("status"),
+                    time.time(),
+                ),
+            )
+        return version, changed | removed
+
+    def invalidate(self, dataset_ids: Iterable[str]):
+        """Force the next sync of these datasets to refetch from the API."""
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE datasets SET stale = 1 WHERE dataset_id = ?",
+                ((str(ds),) for ds in dataset_ids),
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_record_store() -> RecordStore:
+    """Return the process-wide RecordStore, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RecordStore()
+    return _store
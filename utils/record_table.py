@@ -0,0 +1,98 @@
+"""
+Compact in-memory layout of decoded record frames.
+
+Text already lives in Arrow string buffers (pandas' `str` dtype, pandas >= 3
+with pyarrow), which slice and concatenate without copying. What remains expensive is the many
+short, heavily repeated identifiers -- pipeline_run_id, assignee, reviewer,
+package_id, sft_round, ... -- that cost a full string per row. Those are
+dictionary-encoded once per decoded frame (so once per dataset version,
+shared by every session through DATASET_FRAMES); long free-text fields are
+left as Arrow strings. Display and export go through decode_categoricals,
+so users never see the encoding.
+"""
+from typing import Hashable, List
+
+import numpy as np
+import pandas as pd
+
+from config import RECORD_CATEGORY_MAX_RATIO
+
+# Free text and per-record ids: (nearly) unique per row, never dictionary-encoded
+TEXT_COLUMNS = {
+    "id", "uuid", "original_id",
+    "question", "answer", "reason", "metadata", "justification", "qa_feedback",
+    "corrected_question", "corrected_answer",
+}
+
+
+def _is_string(dtype) -> bool:
+    return isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"
+
+
+def decode_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` with dictionary-encoded columns turned back into plain values (for display and export)."""
+    positions = [i for i, dtype in enumerate(df.dtypes) if isinstance(dtype, pd.CategoricalDtype)]
+    if not positions:
+        return df
+    out = df.copy(deep=False)
+    for i in positions:
+        values = np.asarray(out.iloc[:, i], dtype=object)
+        out.isetitem(i, pd.Series(values, index=out.index).infer_objects())
+    return out
+
+
+def compact_records(df: pd.DataFrame, max_ratio: float = RECORD_CATEGORY_MAX_RATIO) -> pd.DataFrame:
+    """
+    Dictionary-encode the low-cardinality string columns of `df` (in place)
+    and return it. Categories are sorted, so grouping and sorting behave as
+    on the plain strings; missing values stay missing.
+    """
+    for i, (column, dtype) in enumerate(zip(df.columns, df.dtypes)):
+        if column in TEXT_COLUMNS or not _is_string(dtype):
+            continue
+        values = df.iloc[:, i]
+        codes, uniques = pd.factorize(values, sort=True)
+        if len(uniques) > max_ratio * len(values):
+            continue
+        df.isetitem(i, pd.Categorical.from_codes(codes, pd.Index(uniques, dtype=object)))
+    return df
+
+
+def constant_column(value: Hashable, rows: int) -> pd.Categorical:
+    """A column holding `value` on every row, stored as one category plus int8 codes."""
+    return pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), pd.Index([value], dtype=object))
+
+
+def concat_records(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    pd.concat(frames, ignore_index=True) that keeps dictionary-encoded columns
+    encoded: a column that is categorical in any frame (and string or missing
+    in the others) is recoded onto the union of categories everywhere, where
+    plain pd.concat would fall back to a Python-object column.
+    """
+    frames = [f for f in frames if f is not None]
+    categories = {}
+    for frame in frames:
+        for column, dtype in zip(frame.columns, frame.dtypes):
+            if isinstance(dtype, pd.CategoricalDtype):
+                categories.setdefault(column, set()).update(dtype.categories)
+
+    def encodable(values: pd.Series) -> bool:
+        return isinstance(values.dtype, pd.CategoricalDtype) or _is_string(values.dtype) or values.isna().all()
+
+    unions = {}
+    for column, values in categories.items():
+        parts = [f[column] for f in frames if column in f.columns]
+        if not all(isinstance(p, pd.Series) and encodable(p) for p in parts):
+            continue
+        for part in parts:
+            if _is_string(part.dtype):
+                values.update(part.dropna().unique())
+        unions[column] = pd.CategoricalDtype(pd.Index(sorted(values, key=str), dtype=object))
+
+    if unions:
+        frames = [
+            frame.assign(**{c: frame[c].astype(dtype) for c, dtype in unions.items() if c in frame.columns})
+            for frame in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,190 @@
+"""
+Background refresh of "hot" projects and datasets.
+
+A single daemon thread per server process keeps the record store and the
+decoded frame cache warm for the configured HOT_PROJECTS / HOT_DATASETS and
+the most recently used projects. It starts with a preload, then refreshes
+every REFRESH_INTERVAL seconds. It is opt-in (REFRESH_ENABLED) and only
+runs with the configured service token (ACCESS_TOKEN): data shared by
+every session is never fetched with one user's session token. Each cycle only requests metadata (one
+listing per project, one pipeline-run list for loose datasets) and lets
+sync_datasets refetch just the datasets whose metadata moved. Results are
+published as an immutable RefreshSnapshot that replaces the previous one in
+a single assignment, and its frames are pinned in DATASET_FRAMES.
+
+    python -m utils.refresh    # run one preload cycle (e.g. before `streamlit run`)
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping
+
+from config import (
+    ACCESS_TOKEN,
+    API_BASE_URL,
+    HOT_PROJECTS,
+    HOT_DATASETS,
+    PREFETCH_PAGE_WORKERS,
+    REFRESH_INTERVAL,
+    REFRESH_RECENT_PROJECTS,
+)
+from utils import client
+from utils.cache import DATASET_FRAMES
+from utils.prefetch import fetch_project, project_metas, recent_projects
+from utils.sync import sync_datasets
+
+
+@dataclass(frozen=True)
+class RefreshSnapshot:
+    published_at: float = 0.0
+    duration: float = 0.0
+    projects: tuple = ()
+    versions: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    fetched: tuple = ()
+    errors: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+
+
+class BackgroundRefresher:
+    """Daemon thread that periodically syncs hot projects and datasets."""
+
+    def __init__(
+        self,
+        interval: float = REFRESH_INTERVAL,
+        hot_projects: Iterable[str] = HOT_PROJECTS,
+        hot_datasets: Iterable[str] = HOT_DATASETS,
+        recent: int = REFRESH_RECENT_PROJECTS,
+        max_workers: int = PREFETCH_PAGE_WORKERS,
+    ):
+        self.interval = interval
+        self.hot_projects = list(hot_projects)
+        self.hot_datasets = [str(d) for d in hot_datasets]
+        self.recent = recent
+        self.max_workers = max_workers
+        self._token = ACCESS_TOKEN or None  # service token only
+        self._snapshot = RefreshSnapshot()
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # --- control ---
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._token)
+
+    def start(self):
+        """Start the worker thread (a no-op without a service token)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="background-refresh", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def snapshot(self) -> RefreshSnapshot:
+        return self._snapshot
+
+    # --- work ---
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:  # never let one bad cycle stop the worker
+                self._snapshot = RefreshSnapshot(
+                    published_at=time.time(), errors=MappingProxyType({"*": str(e)})
+                )
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def targets(self) -> List[str]:
+        return list(dict.fromkeys([str(p) for p in self.hot_projects] + recent_projects(self.recent)))
+
+    def refresh(self) -> RefreshSnapshot:
+        """Run one refresh cycle and publish its snapshot."""
+        token = self._token
+        started = time.monotonic()
+        headers = {"Authorization": f"Bearer {token}"}
+        metas, errors = {}, {}
+
+        projects = self.targets()
+        for project_id in projects:
+            project, response = fetch_project(project_id, headers, token, force=True)
+            if project is None:
+                errors[f"project:{project_id}"] = f"{response.status_code}: {response.text[:200]}"
+                continue
+            metas.update(project_metas(project))
+
+        loose = [d for d in self.hot_datasets if d not in metas]
+        if loose:
+            metas.update(self._run_metas(loose, headers, errors))
+
+        result = sync_datasets(list(metas), metas, headers, max_workers=self.max_workers)
+        errors.update(result.errors)
+
+        frames = {ds: (result.versions[ds], frame) for ds, frame in result.frames.items() if result.versions.get(ds)}
+        DATASET_FRAMES.pin(frames)
+        snapshot = RefreshSnapshot(
+            published_at=time.time(),
+            duration=time.monotonic() - started,
+            projects=tuple(projects),
+            versions=MappingProxyType(dict(result.versions)),
+            fetched=tuple(result.fetched),
+            errors=MappingProxyType(errors),
+        )
+        self._snapshot = snapshot
+        return snapshot
+
+    def _run_metas(self, dataset_ids: List[str], headers: Dict, errors: Dict) -> Dict[str, Dict]:
+        """Metadata for loose hot datasets from one `/data_v2/pipeline` listing."""
+        response = client.get(f"{API_BASE_URL}/api/v1/data_v2/pipeline", headers=headers)
+        if response.status_code != 200:
+            errors["pipeline_runs"] = f"{response.status_code}: {response.text[:200]}"
+            return {}
+        wanted = set(dataset_ids)
+        return {
+            str(run["id"]): {
+                "id": run["id"],
+                "run_name": run.get("run_name"),
+                "run_id": run.get("run_id"),
+                "status": run.get("status"),
+                "updated_at": run.get("updated_at"),
+                "total_rows": run.get("total_rows", run.get("row_count")),
+            }
+            for run in response.json()
+            if isinstance(run, dict) and str(run.get("id")) in wanted and run.get("run_id")
+        }
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_refresher() -> BackgroundRefresher:
+    """Return the process-wide BackgroundRefresher, creating it on first use."""
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = BackgroundRefresher()
+    return _refresher
+
+
+def start_background_refresh() -> BackgroundRefresher:
+    """Start the worker once per process (safe to call on every rerun)."""
+    refresher = get_refresher()
+    refresher.start()
+    return refresher
+
+
+if __name__ == "__main__":
+    refresher = get_refresher()
+    if not refresher.enabled:
+        raise SystemExit("Set ACCESS_TOKEN to preload hot projects.")
+    snap = refresher.refresh()
+    print(f"Synced {len(snap.versions)} datasets from {len(snap.projects)} projects "
+          f"({len(snap.fetched)} refetched) in {snap.duration:.1f}s; errors: {dict(snap.errors) or 'none'}")
@@ -0,0 +1,214 @@
+"""
+Vectorized completion / QA report engine shared by the report pages.
+
+Row-level flags (completed, QA done, pass, ...) are computed once per call,
+then every metric comes out of a single grouped sum. Metrics are declared
+in a registry, so a page picks the columns it wants and new metrics only
+need a registration.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from config import COMPLETED_STATUS, QA_DONE_STATUS
+from utils.data_processing import get_performance_tiers
+
+
+def match_values(series: pd.Series, values: Iterable[str]) -> np.ndarray:
+    """
+    Boolean mask of rows whose lowercased value is in `values`.
+    Lowercasing happens once per distinct value (cheap for categoricals);
+    missing values never match.
+    """
+    codes, uniques = pd.factorize(series)
+    hit = pd.Index(uniques).astype(str).str.lower().isin(list(values))
+    return np.append(np.asarray(hit, dtype=bool), False)[codes]
+
+
+# --- row-level flags ---
+
+FLAGS: Dict[str, Callable[[pd.DataFrame], np.ndarray]] = {}
+
+
+def register_flag(name: str):
+    def register(func):
+        FLAGS[name] = func
+        return func
+    return register
+
+
+def _column_match(df: pd.DataFrame, column: str, values: Iterable[str]) -> np.ndarray:
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return match_values(df[column], values)
+
+
+@register_flag("is_completed")
+def _(df):
+    return _column_match(df, "status", COMPLETED_STATUS)
+
+
+@register_flag("is_ready_for_qa")
+def _(df):
+    return _column_match(df, "status", ["ready_for_qa"])
+
+
+@register_flag("is_qa_done")
+def _(df):
+    return _column_match(df, "status", QA_DONE_STATUS)
+
+
+@register_flag("is_pass")
+def _(df):
+    return _column_match(df, "qa_flag", ["pass"])
+
+
+@register_flag("is_fail")
+def _(df):
+    return _column_match(df, "qa_flag", ["fail"])
+
+
+# --- metrics ---
+
+@dataclass(frozen=True)
+class Metric:
+    """
+    kind:
+        "size"  -- rows in the group
+        "count" -- rows in the group with `flag` set
+        "rate"  -- round(numerator / denominator * 100, 2), 0 when the denominator is 0
+        "tier"  -- performance tier of the `source` rate
+    """
+    name: str
+    kind: str
+    flag: str = None
+    numerator: str = None
+    denominator: str = None
+    source: str = None
+
+
+METRICS: Dict[str, Metric] = {}
+
+
+def register_metric(name: str, kind: str, **kwargs) -> Metric:
+    METRICS[name] = Metric(name, kind, **kwargs)
+    return METRICS[name]
+
+
+register_metric("total_assigned", "size")
+register_metric("total_completed", "count", flag="is_completed")
+register_metric("comp_rate", "rate", numerator="total_completed", denominator="total_assigned")
+register_metric("ready_for_qa", "count", flag="is_ready_for_qa")
+register_metric("selected_qa_rate", "rate", numerator="ready_for_qa", denominator="total_completed")
+register_metric("total_qa", "count", flag="is_qa_done")
+register_metric("qa_comp_rate", "rate", numerator="total_qa", denominator="total_completed")
+register_metric("qa_pass", "count", flag="is_pass")
+register_metric("qa_fail", "count", flag="is_fail")
+register_metric("qa_pass_rate", "rate", numerator="qa_pass", denominator="total_qa")
+register_metric("performance_tier", "tier", source="qa_pass_rate")
+
+# Column sets used by the pages
+PROJECT_REPORT_METRICS = [
+    "total_assigned", "total_completed", "comp_rate", "total_qa", "qa_comp_rate",
+    "qa_pass", "qa_fail", "qa_pass_rate", "performance_tier",
+]
+QA_REPORT_METRICS = [
+    "total_assigned", "total_completed", "comp_rate", "ready_for_qa", "selected_qa_rate",
+    "total_qa", "qa_comp_rate", "qa_pass", "qa_fail", "qa_pass_rate", "performance_tier",
+]
+
+
+def _dependencies(names: List[str]) -> List[str]:
+    """`names` plus every metric they are derived from, dependencies first."""
+    ordered = []
+
+    def visit(name):
+        if name in ordered:
+            return
+        metric = METRICS[name]
+        for dep in (metric.numerator, metric.denominator, metric.source):
+            if dep:
+                visit(dep)
+        ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return ordered
+
+
+def report_flags(metrics: List[str]) -> List[str]:
+    """Row-level flags the given metrics (and their dependencies) are counted from."""
+    return sorted({METRICS[m].flag for m in _dependencies(metrics) if METRICS[m].kind == "count"})
+
+
+def compute_report(
+    records: pd.DataFrame,
+    group_by: List[str],
+    metrics: List[str],
+    labels: Dict[str, str] = None,
+) -> pd.DataFrame:
+    """
+    One row per group of `group_by` with the requested metrics, groups in
+    sorted key order. Rows with a missing key are dropped (as groupby does);
+    empty-string keys are shown as `labels[column]`.
+    """
+    flags = report_flags(metrics)
+    if records is None or records.empty or any(c not in records.columns for c in group_by):
+        return pd.DataFrame()
+
+    frame = records[group_by].copy()
+    for flag in flags:
+        frame[flag] = FLAGS[flag](records).astype(np.int64)
+
+    grouped = frame.groupby(group_by, sort=True, observed=True, dropna=True)
+    out = grouped[flags].sum() if flags else pd.DataFrame(index=grouped.size().index)
+    return _finish_report(out, grouped.size(), group_by, metrics, labels)
+
+
+def compute_report_from_counts(
+    counts: pd.DataFrame,
+    group_by: List[str],
+    metrics: List[str],
+    labels: Dict[str, str] = None,
+) -> pd.DataFrame:
+    """
+    compute_report over pre-aggregated rows: `group_by` columns, a `size`
+    column (records in the row) and one column per flag in report_flags().
+    """
+    flags = report_flags(metrics)
+    if counts is None or counts.empty or any(c not in counts.columns for c in group_by):
+        return pd.DataFrame()
+
+    counts = counts[counts["size"] > 0]
+    grouped = counts.groupby(group_by, sort=True, observed=True, dropna=True)
+    out = grouped[flags].sum() if flags else pd.DataFrame(index=grouped.size().index)
+    return _finish_report(out, grouped["size"].sum(), group_by, metrics, labels)
+
+
+def _finish_report(out: pd.DataFrame, sizes: pd.Series, group_by, metrics, labels) -> pd.DataFrame:
+    """Derive every requested metric from the grouped flag sums and group sizes."""
+    if out.empty:
+        return pd.DataFrame()
+
+    for name in _dependencies(metrics):
+        metric = METRICS[name]
+        if metric.kind == "size":
+            out[name] = sizes
+        elif metric.kind == "count":
+            out[name] = out[metric.flag]
+        elif metric.kind == "rate":
+            num = out[metric.numerator].to_numpy(dtype=float)
+            den = out[metric.denominator].to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[name] = np.where(den > 0, np.round(num / den * 100, 2), 0)
+        elif metric.kind == "tier":
+            out[name] = get_performance_tiers(out[metric.source])
+
+    out = out[metrics].reset_index()
+    for column in group_by:
+        out[column] = out[column].astype(object)
+        if labels and column in labels:
+            out.loc[out[column] == "", column] = labels[column]
+    return out
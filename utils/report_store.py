@@ -0,0 +1,234 @@
+"""
+Materialized report counts per dataset, maintained from record deltas.
+
+For every synced dataset version the store keeps, per record, the group it
+counts towards (assignee id, status) and its report flags, plus the summed
+counts per group. When a sync commits a new version, only the changed
+records are read back from the record store: their old contribution is
+subtracted and the new one added, so a refresh costs O(changes) instead of
+a recompute over every record. Reports are then built from the group
+totals (see compute_report_from_counts).
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import REPORT_COUNTS_MAX_ROWS
+from utils.normalize import normalize_records, resolve_assignee_names
+from utils.report_engine import FLAGS
+
+COUNT_FLAGS = sorted(FLAGS)
+KEY_COLUMNS = ["assignee", "status"]
+
+
+def _record_ids(frame: pd.DataFrame) -> Optional[pd.Index]:
+    """Record-store ids of the frame's rows, or None if rows can't be matched by id."""
+    if "id" not in frame.columns or frame["id"].isna().any():
+        return None
+    ids = pd.Index(frame["id"].astype(str))
+    return ids if ids.is_unique else None
+
+
+class DatasetCounts:
+    """Per-record contributions and per-group totals of one dataset version."""
+
+    def __init__(self, version: int, frame: pd.DataFrame):
+        self.version = version
+        self.groups = {}  # (assignee, status) -> group code
+        self.keys = []
+        self.totals = np.zeros((0, 1 + len(COUNT_FLAGS)), dtype=np.int64)  # [size, *flags] per group
+
+        codes, flags = self._contributions(frame)
+        self._add(codes, flags, 1)
+        # Without stable record ids a delta can't be applied; the owner rebuilds instead
+        self.ids = _record_ids(frame)
+        if self.ids is not None:
+            self.codes, self.flags = codes, flags
+            self.alive = np.ones(len(codes), dtype=bool)
+
+    @property
+    def incremental(self) -> bool:
+        return self.ids is not None
+
+    @property
+    def rows(self) -> int:
+        return int(self.totals[:, 0].sum())
+
+    def _group(self, key: Tuple) -> int:
+        code = self.groups.get(key)
+        if code is None:
+            code = self.groups[key] = len(self.keys)
+            self.keys.append(key)
+            self.totals = np.vstack([self.totals, np.zeros((1, self.totals.shape[1]), dtype=np.int64)])
+        return code
+
+    def _contributions(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """(group code, flag row) of every record in `frame`, normalized as at ingest."""
+        normalized = normalize_records(
+            frame[[c for c in ("status", "qa_flag") if c in frame.columns]].copy(), ["status", "qa_flag"]
+        )
+        flags = np.column_stack(
+            [FLAGS[name](normalized) for name in COUNT_FLAGS] or [np.zeros(len(frame))]
+        ).astype(np.int8)
+
+        keys = pd.DataFrame({
+            "assignee": frame["assignee"].astype(object) if "assignee" in frame.columns else None,
+            "status": normalized["status"].astype(object) if "status" in normalized.columns else None,
+        }, index=frame.index)
+        grouped = keys.groupby(KEY_COLUMNS, dropna=False, sort=False)
+        local = grouped.ngroup().to_numpy()
+        mapping = np.array(
+            [self._group(tuple(None if pd.isna(v) else v for v in key)) for key in grouped.size().index],
+            dtype=np.int64,
+        )
+        return mapping[local] if len(local) else local.astype(np.int64), flags
+
+    def _add(self, codes: np.ndarray, flags: np.ndarray, sign: int):
+        if not len(codes):
+            return
+        n = len(self.keys)
+        self.totals[:, 0] += sign * np.bincount(codes, minlength=n)
+        for j in range(flags.shape[1]):
+            self.totals[:, j + 1] += sign * np.bincount(codes, weights=flags[:, j], minlength=n).astype(np.int64)
+
+    def apply(self, version: int, changed: Iterable[str], found: List[str], frame: pd.DataFrame):
+        """
+        Move to `version`: drop the old contribution of every changed record
+        id, then add `frame` (the current payloads of the `found` ids; ids
+        that were removed from the dataset are simply not in it).
+        """
+        pos = self.ids.get_indexer(list(changed))
+        old = pos[pos >= 0]
+        old = old[self.alive[old]]
+        self._add(self.codes[old], self.flags[old], -1)
+        self.alive[old] = False
+
+        codes, flags = self._contributions(frame)
+        self._add(codes, flags, 1)
+        where = self.ids.get_indexer(found)
+        known = where >= 0
+        self.codes[where[known]] = codes[known]
+        self.flags[where[known]] = flags[known]
+        self.alive[where[known]] = True
+        if not known.all():
+            self.ids = self.ids.append(pd.Index(np.asarray(found, dtype=object)[~known]))
+            self.codes = np.concatenate([self.codes, codes[~known]])
+            self.flags = np.concatenate([self.flags, flags[~known]])
+            self.alive = np.concatenate([self.alive, np.ones(int((~known).sum()), dtype=bool)])
+        self.version = version
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per (assignee, status) group: key columns, `size` and one column per flag."""
+        out = pd.DataFrame(self.keys, columns=KEY_COLUMNS, dtype=object)
+        out["size"] = self.totals[:, 0]
+        for j, name in enumerate(COUNT_FLAGS):
+            out[name] = self.totals[:, j + 1]
+        return out[out["size"] > 0]
+
+
+class ReportCounts:
+    """
+    Process-wide LRU of DatasetCounts keyed by dataset id, bounded by the
+    number of records tracked. Only the newest version of a dataset is kept.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._data = OrderedDict()  # dataset_id -> DatasetCounts
+        self._lock = threading.Lock()
+
+    def ensure(self, dataset_id: str, version: int, frame: pd.DataFrame):
+        """Build the counts of a dataset version from its full frame unless they are already held."""
+        dataset_id = str(dataset_id)
+        with self._lock:
+            entry = self._data.get(dataset_id)
+            if entry is not None and entry.version == version:
+                self._data.move_to_end(dataset_id)
+                return
+        entry = DatasetCounts(version, frame)
+        with self._lock:
+            self._data[dataset_id] = entry
+            self._data.move_to_end(dataset_id)
+            while len(self._data) > 1 and sum(e.rows for e in self._data.values()) > self.max_rows:
+                self._data.popitem(last=False)
+
+    def apply_changes(
+        self,
+        dataset_id: str,
+        version: int,
+        changed: Iterable[str],
+        loader: Callable[[List[str]], Tuple[List[str], pd.DataFrame]],
+    ):
+        """
+        Advance a dataset's counts to the version a sync just committed, reading
+        only the `changed` records through `loader(ids) -> (found_ids, frame)`.
+        Counts that are missing or more than one version behind are dropped and
+        rebuilt by the next ensure().
+        """
+        dataset_id = str(dataset_id)
+        with self._lock:
+            entry = self._data.get(dataset_id)
+        if entry is None or entry.version == version:
+            return
+        if not entry.incremental or entry.version != version - 1:
+            self.invalidate([dataset_id])
+            return
+        try:
+            found, frame = loader(sorted(changed))
+            with self._lock:
+                if self._data.get(dataset_id) is entry and entry.version == version - 1:
+                    entry.apply(version, changed, found, frame)
+        except Exception:
+            # A half-applied delta is worse than a rebuild
+            self.invalidate([dataset_id])
+
+    def counts(self, versions: Dict[str, int]) -> Optional[pd.DataFrame]:
+        """Group totals of the given dataset versions (with a dataset_id column), or None if any is not held."""
+        frames = []
+        with self._lock:
+            for dataset_id, version in versions.items():
+                entry = self._data.get(str(dataset_id))
+                if entry is None or entry.version != version:
+                    return None
+                frames.append(entry.to_frame().assign(dataset_id=dataset_id))
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def invalidate(self, dataset_ids: Iterable[str] = None):
+        with self._lock:
+            if dataset_ids is None:
+                self._data.clear()
+                return
+            for ds in dataset_ids:
+                self._data.pop(str(ds), None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+REPORT_COUNTS = ReportCounts(max_rows=REPORT_COUNTS_MAX_ROWS)
+
+
+def report_counts(records: pd.DataFrame, user_data: Dict[str, str]) -> Optional[pd.DataFrame]:
+    """
+    Pre-aggregated counts for a frame built by get_dataset_records, resolved to
+    the same key columns the frame has (assignee_name, dataset_name and any
+    per-dataset columns listed in its attrs). None when the frame's datasets
+    are not all held at its versions, or the frame was filtered since.
+    """
+    versions = records.attrs.get("dataset_versions")
+    if not versions:
+        return None
+    counts = REPORT_COUNTS.counts(versions)
+    if counts is None or int(counts["size"].sum()) != len(records):
+        return None
+
+    counts["dataset_name"] = counts["dataset_id"].map(records.attrs.get("dataset_names", {}))
+    for column, mapping in records.attrs.get("dataset_columns", {}).items():
+        counts[column] = counts["dataset_id"].map(mapping)
+    counts["assignee_name"] = resolve_assignee_names(counts["assignee"], user_data or {})
+    return normalize_records(counts)
@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    In-flight de-duplication: concurrent callers asking for the same key
+    wait for one outstanding call and share its result (or its exception).
+    Nothing is cached once the call finishes. Module-level instances are
+    shared by every Streamlit session in the process.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """Run `func` unless a call for `key` is already running. Returns (result, shared)."""
+        leader, call = self.claim(key)
+        if not leader:
+            return self.wait(call), True
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.release(key, call, error=e)
+            raise
+        self.release(key, call, result=result)
+        return result, False
+
+    def claim(self, key: Hashable) -> Tuple[bool, _Call]:
+        """Become the leader for `key`, or join the running call. Returns (is_leader, call)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return False, call
+            call = self._calls[key] = _Call()
+            return True, call
+
+    def release(self, key: Hashable, call: _Call, result: Any = None, error: BaseException = None):
+        """Publish the leader's outcome and wake every waiter."""
+        call.result, call.error = result, error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    @staticmethod
+    def wait(call: _Call, timeout: float = None) -> Any:
+        if not call.event.wait(timeout):
+            raise TimeoutError("in-flight call did not finish in time")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._calls)
+
+
+# Data pages: (token scope, pipeline run id, page, with_payloads)
+PAGE_FLIGHTS = SingleFlight()
+# Whole-dataset syncs: (token scope, dataset id)
+SYNC_FLIGHTS = SingleFlight()
@@ -18,6 +18,7 @@ def init_session_state():
         # Data pipeline
         "pipeline_data": {},
         "pipeline_runs": [],
+        "dataset_meta": {},
 
         # Projects
         "projects":{},
@@ -0,0 +1,143 @@
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Set
+
+import pandas as pd
+
+from config import PAGE_FETCH_WORKERS, SYNC_WAIT_SECONDS
+from utils import client
+from utils.cache import DATASET_FRAMES
+from utils.fetch import fetch_datasets
+from utils.record_store import get_record_store
+from utils.report_store import REPORT_COUNTS
+from utils.singleflight import SYNC_FLIGHTS
+
+
+@dataclass
+class SyncResult:
+    frames: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    versions: Dict[str, int] = field(default_factory=dict)
+    changed: Dict[str, Set[str]] = field(default_factory=dict)
+    fetched: List[str] = field(default_factory=list)
+
+
+def sync_datasets(
+    dataset_ids: Iterable[str],
+    metas: Dict[str, Dict],
+    headers: Dict,
+    max_workers: int = PAGE_FETCH_WORKERS,
+    on_progress: Callable[[int, int], None] = None,
+    force_refresh: bool = False,
+) -> SyncResult:
+    """
+    Bring the local record store up to date for the given datasets and
+    return their records as one DataFrame per dataset.
+
+    Datasets whose metadata shows no change since the last sync (closed, or
+    same `updated_at` / row count) are served from the store without any
+    request. The rest are refetched through the shared page scheduler;
+    pages are staged as they arrive and merged record by record once the
+    dataset is complete. If a refetch fails, the last stored copy is
+    returned alongside the error.
+
+    A dataset that another session is already syncing (same token scope) is
+    not fetched again: this call waits for that sync and reads its result.
+
+    Stored frames are kept decoded in DATASET_FRAMES (per store version), so
+    a dataset that another session or the prefetcher already loaded is not
+    read back from SQLite.
+    """
+    store = get_record_store()
+    result = SyncResult()
+    dataset_ids = list(dict.fromkeys(dataset_ids))
+    scope = client.token_scope(headers.get("Authorization"))
+
+    stale = [
+        ds for ds in dataset_ids
+        if force_refresh or not store.is_fresh(ds, metas.get(str(ds)))
+    ]
+    # Datasets another session is already syncing are waited for, not refetched
+    claims = {ds: SYNC_FLIGHTS.claim((scope, str(ds))) for ds in stale}
+    leading = [ds for ds in stale if claims[ds][0]]
+    following = [ds for ds in stale if not claims[ds][0]]
+    sync_ids = {ds: store.begin_sync(ds) for ds in leading}
+
+    def on_payloads(ds, page, payloads):
+        store.stage_page(sync_ids[ds], page, payloads)
+
+    try:
+        fetched, result.errors = fetch_datasets(
+            leading, headers, max_workers=max_workers, on_progress=on_progress, on_payloads=on_payloads
+        )
+    except BaseException as e:
+        for ds, sync_id in sync_ids.items():
+            store.discard_sync(sync_id)
+            SYNC_FLIGHTS.release((scope, str(ds)), claims[ds][1], error=e)
+        raise
+
+    committed = {}
+    pending = list(leading)
+    try:
+        while pending:
+            ds, error = pending[0], None
+            try:
+                if ds in fetched and ds not in result.errors:
+                    version, changed = store.commit_sync(sync_ids[ds], ds, metas.get(str(ds)))
+                    # Report counts follow the commit by reading back only the changed records
+                    REPORT_COUNTS.apply_changes(ds, version, changed, lambda ids, ds=ds: store.load_records(ds, ids))
+                    frame = fetched.pop(ds)
+                    DATASET_FRAMES.put(ds, version, frame)
+                    committed[ds] = (version, frame.copy(deep=False), changed)
+                else:
+                    store.discard_sync(sync_ids[ds])
+            except BaseException as e:
+                error = e
+                with suppress(Exception):
+                    store.discard_sync(sync_ids[ds])
+                raise
+            finally:
+                pending.pop(0)
+                # Waiters only need to know the sync is over (and why it failed)
+                SYNC_FLIGHTS.release((scope, str(ds)), claims[ds][1], result=result.errors.get(ds), error=error)
+    finally:
+        # A failed commit must not leave the remaining datasets claimed and staged
+        for ds in pending:
+            with suppress(Exception):
+                store.discard_sync(sync_ids[ds])
+            SYNC_FLIGHTS.release(
+                (scope, str(ds)), claims[ds][1], error=RuntimeError("sync aborted before this dataset was committed")
+            )
+
+    for ds in following:
+        try:
+            error = SYNC_FLIGHTS.wait(claims[ds][1], timeout=SYNC_WAIT_SECONDS)
+        except Exception as e:
+            error = str(e)
+        if error:
+            result.errors[ds] = error
+
+    for ds in dataset_ids:
+        if ds in committed:
+            version, result.frames[ds], result.changed[ds] = committed[ds]
+            result.fetched.append(ds)
+        else:
+            state = store.get_state(ds)
+            if state is not None:
+                version = state["version"]
+                frame = DATASET_FRAMES.get(ds, version)
+                if frame is None:
+                    frame = store.load_frame(ds)
+                    DATASET_FRAMES.put(ds, version, frame)
+                    frame = frame.copy(deep=False)
+                result.frames[ds] = frame
+            elif ds in fetched:
+                # Partial fetch with nothing stored yet: show it, but don't persist it
+                version = 0
+                result.frames[ds] = fetched.pop(ds)
+            else:
+                continue
+            result.changed[ds] = set()
+        result.versions[ds] = version
+
+    return result
@@ -0,0 +1,117 @@
+import math
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Client-side request rate limit: `rate` tokens per second, up to `burst`.
+    `pause_for` blocks every caller (e.g. for a server's Retry-After).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1 or self.rate <= 0:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause_for(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit (additive increase, multiplicative decrease).
+
+    The limit grows by roughly one slot per round of healthy responses and is
+    cut by `decrease` on 429/5xx, transport errors, or when the recent p95
+    latency rises above `latency_target`. Cuts are spaced by a cooldown so a
+    single burst of errors only halves the limit once.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        decrease: float = 0.5,
+        window: int = 50,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= math.floor(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, ok: bool):
+        """Return a slot; `ok` is False for throttling, 5xx or transport failures."""
+        with self._cond:
+            self.in_flight -= 1
+            self._latencies.append(latency)
+            if not ok or self._p95() > self.latency_target:
+                self._cut()
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _p95(self) -> float:
+        if len(self._latencies) < 10:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _cut(self):
+        now = time.monotonic()
+        cooldown = max(self._latencies) if self._latencies else 1.0
+        if now - self._last_cut < cooldown:
+            return
+        self._last_cut = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        # Old latencies describe the previous load level
+        self._latencies.clear()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
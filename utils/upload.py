@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+from config import (
+    API_BASE_URL,
+    UPLOAD_SHARD_ROWS,
+    UPLOAD_COMPRESS_WORKERS,
+    UPLOAD_WORKERS,
+    UPLOAD_ATTEMPTS,
+    UPLOAD_MANIFEST_DIR,
+)
+from utils import client
+from utils.data_processing import write_json_zip
+from utils.multipart import MultipartStream
+
+UNKNOWN_OUTCOME = "Outcome unknown, check before retrying"
+
+
+def _post_zip(zip_file, run_id: str, name: str, headers: Dict) -> requests.Response:
+    files = {"file": (f"{name}.zip", zip_file, "application/zip")}
+    data = {"run_id": run_id, "run_name": name, "modality": "text", "data_type": "sft"}
+    # Stream the zip from its file object instead of copying it into one request body
+    body = MultipartStream(data, files)
+    return client.post(
+        f"{API_BASE_URL}/api/v1/data_v2/upload",
+        headers={**headers, "Content-Type": body.content_type},
+        data=body,
+    )
+
+
+def post_zip_upload(zip_file, run_id: str, name: str, headers: Dict) -> Tuple[bool, str]:
+    """POST one zip to the upload endpoint; safe to call from worker threads."""
+    response = _post_zip(zip_file, run_id, name, headers)
+    if response.status_code == 200:
+        return True, f"Uploaded {name}"
+    return False, f"Failed {response.status_code}: {response.text}"
+
+
+def plan_shards(df: pd.DataFrame, by: str = None, shard_rows: int = UPLOAD_SHARD_ROWS) -> List[Dict]:
+    """
+    Split `df` into upload shards of roughly `shard_rows` rows.
+
+    With `by` (e.g. "package_id") a key's rows never span two shards: keys are
+    packed largest first into the currently smallest shard. Otherwise the
+    frame is cut into contiguous row slices. The plan is deterministic, so the
+    same frame always yields the same parts (which lets failed parts be retried).
+
+    Returns:
+        [{"part", "rows": positional index array, "keys"}]
+    """
+    shard_rows = max(1, shard_rows)
+    if by is None or by not in df.columns:
+        return [
+            {"part": i + 1, "rows": np.arange(start, min(start + shard_rows, len(df))), "keys": []}
+            for i, start in enumerate(range(0, len(df), shard_rows))
+        ]
+
+    groups = pd.Series(np.arange(len(df))).groupby(df[by].astype(str).to_numpy(), sort=True).indices
+    n_shards = max(1, min(len(groups), -(-len(df) // shard_rows)))
+    shards = [{"part": i + 1, "rows": [], "keys": [], "size": 0} for i in range(n_shards)]
+    for key in sorted(groups, key=lambda k: (-len(groups[k]), k)):
+        target = min(shards, key=lambda s: (s["size"], s["part"]))
+        target["rows"].append(groups[key])
+        target["keys"].append(key)
+        target["size"] += len(groups[key])
+    return [
+        {"part": s["part"], "rows": np.sort(np.concatenate(s["rows"])), "keys": s["keys"]}
+        for s in shards if s["rows"]
+    ]
+
+
+def compress_shard(df: pd.DataFrame, rows: np.ndarray, directory: str) -> Tuple[str, int, str]:
+    """Write the shard `df.iloc[rows]` to a zip file in `directory` (runs in a worker thread).
+
+    Returns:
+        (path, size_bytes, sha256)
+    """
+    fd, path = tempfile.mkstemp(suffix=".zip", dir=directory)
+    with os.fdopen(fd, "w+b") as f:
+        write_json_zip(df.iloc[rows], f)
+        f.seek(0)
+        digest = hashlib.sha256()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+        size = f.tell()
+    return path, size, digest.hexdigest()
+
+
+def _upload_part(path: str, run_id: str, name: str, headers: Dict, max_attempts: int) -> Tuple[Optional[bool], str, int]:
+    """
+    Upload one part, resending it only while the server certainly never got it
+    (connection not established, 429/503). Uploads are not idempotent, so any
+    other failure may already have created the run.
+
+    Returns:
+        (ok, msg, attempts) -- ok is None when the outcome is unknown
+    """
+    attempts = 0
+    while True:
+        if attempts:
+            time.sleep(random.uniform(0, 2 ** attempts))
+        attempts += 1
+        try:
+            with open(path, "rb") as f:
+                response = _post_zip(f, run_id, name, headers)
+        except Exception as e:
+            if not client.not_applied(error=e):
+                return None, f"{UNKNOWN_OUTCOME}: {e}", attempts
+            msg = f"Exception: {e}"
+        else:
+            if response.status_code == 200:
+                return True, f"Uploaded {name}", attempts
+            msg = f"Failed {response.status_code}: {response.text}"
+            if not client.not_applied(status_code=response.status_code):
+                # A 4xx rejected the part; a 5xx may have failed after storing it
+                if response.status_code >= 500:
+                    return None, f"{UNKNOWN_OUTCOME}: {msg}", attempts
+                return False, msg, attempts
+        if attempts >= max(1, max_attempts):
+            return False, msg, attempts
+
+
+def _outcome(ok: Optional[bool]) -> str:
+    return {True: "uploaded", False: "failed", None: "unknown"}[ok]
+
+
+def part_name(base: str, part: int) -> str:
+    return f"{base}-part{part:03d}"
+
+
+def run_sharded_upload(
+    df: pd.DataFrame,
+    run_id: str,
+    name: str,
+    headers: Dict,
+    by: str = None,
+    shard_rows: int = UPLOAD_SHARD_ROWS,
+    parts: Iterable[int] = None,
+    compress_workers: int = UPLOAD_COMPRESS_WORKERS,
+    upload_workers: int = UPLOAD_WORKERS,
+    max_attempts: int = UPLOAD_ATTEMPTS,
+    on_progress: Callable[[int, int], None] = None,
+) -> Dict:
+    """
+    Upload `df` as several runs `{run_id}-partNNN` / `{name}-partNNN`.
+
+    Shards are compressed in a thread pool (zlib releases the GIL; a process
+    pool would fork the multithreaded server and pickle every shard) and each
+    one is uploaded from a second thread pool as soon as its zip is ready. A
+    part is resent (up to `max_attempts` times) only when the server never
+    got it; a part whose outcome is unknown is marked so in the manifest. `parts` restricts the upload to those part numbers
+    (e.g. the failed parts of an earlier manifest). `on_progress(done, total)`
+    runs in the calling thread and counts compressed and uploaded shards.
+
+    Returns the upload manifest, which is also written to UPLOAD_MANIFEST_DIR.
+    """
+    shards = plan_shards(df, by=by, shard_rows=shard_rows)
+    if parts is not None:
+        wanted = set(parts)
+        shards = [s for s in shards if s["part"] in wanted]
+
+    entries = {}
+    total = 2 * len(shards)
+    done = 0
+    with tempfile.TemporaryDirectory(prefix="dot-upload-") as tmp, \
+            ThreadPoolExecutor(max_workers=max(1, compress_workers)) as cpool, \
+            ThreadPoolExecutor(max_workers=max(1, upload_workers)) as upool:
+        compressing = {}
+        for shard in shards:
+            entries[shard["part"]] = {
+                "part": shard["part"],
+                "run_id": part_name(run_id, shard["part"]),
+                "run_name": part_name(name, shard["part"]),
+                "rows": len(shard["rows"]),
+                "keys": shard["keys"],
+            }
+            # Workers slice their own rows, so only one shard per worker is materialized at a time
+            compressing[cpool.submit(compress_shard, df, shard["rows"], tmp)] = shard["part"]
+
+        uploading = {}
+        for future in as_completed(compressing):
+            part = compressing[future]
+            entry = entries[part]
+            try:
+                path, entry["bytes"], entry["sha256"] = future.result()
+            except Exception as e:
+                entry.update(attempts=0, success=False, outcome="failed", msg=f"Compression failed: {e}")
+            else:
+                uploading[upool.submit(
+                    _upload_part, path, entry["run_id"], entry["run_name"], headers, max_attempts
+                )] = part
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+        for future in as_completed(uploading):
+            entry = entries[uploading[future]]
+            ok, entry["msg"], entry["attempts"] = future.result()
+            entry["success"], entry["outcome"] = bool(ok), _outcome(ok)
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+    manifest = {
+        "run_id": run_id,
+        "run_name": name,
+        "sharded_by": by if by in df.columns else None,
+        "shard_rows": shard_rows,
+        "total_rows": len(df),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "parts": [entries[p] for p in sorted(entries)],
+    }
+    write_manifest(manifest)
+    return manifest
+
+
+def write_manifest(manifest: Dict, directory: str = UPLOAD_MANIFEST_DIR) -> str:
+    """Persist an upload manifest as JSON and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = manifest["created_at"].replace(":", "").replace("-", "")
+    path = os.path.join(directory, f"{manifest['run_id']}-{stamp}.json")
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    return path
+
+
+def failed_parts(manifest: Dict) -> List[int]:
+    """Parts the server certainly did not take, so they are safe to upload again."""
+    return [
+        p["part"] for p in manifest.get("parts", [])
+        if not p.get("success") and p.get("outcome") != "unknown"
+    ]
+
+
+def unknown_parts(manifest: Dict) -> List[int]:
+    """Parts that may or may not have been uploaded; check the run before retrying them."""
+    return [p["part"] for p in manifest.get("parts", []) if p.get("outcome") == "unknown"]
@@ -1,9 +1,14 @@
+import json
 import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
-from utils.api import get_users
-from config import COMPLETED_STATUS, INCOMPLETE_STATUS, QA_DONE_STATUS,USABLE_COLUMNS
+from utils.api import get_users, upload_sharded
+from utils.metrics import REQUEST_LOG
+from utils.upload import failed_parts, unknown_parts, write_manifest
+from utils.quality_cycles import sweep_thresholds, threshold_range
+from config import COMPLETED_STATUS, INCOMPLETE_STATUS, QA_DONE_STATUS,USABLE_COLUMNS, UPLOAD_SHARD_ROWS
+from config import CYCLE_SWEEP_QA_RANGE, CYCLE_SWEEP_PASS_RANGE
 
 def status_distribution(df):
     counts = df['status'].value_counts().reset_index()
@@ -186,3 +191,109 @@ def create_visualizations(df: pd.DataFrame):
                     except Exception as e:
                         st.error(f"Could not plot for column '{col_name}': {e}")
 
+
+
+def http_metrics_panel():
+    """Sidebar panel with per-endpoint API latency stats and log export."""
+    st.sidebar.subheader("🌐 API Requests")
+    summary = REQUEST_LOG.summary()
+    if summary.empty:
+        st.sidebar.caption("No API requests recorded yet.")
+        return
+
+    st.sidebar.dataframe(
+        summary[["endpoint", "requests", "errors", "retries", "total_time", "p50", "p95", "p99"]],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    endpoint = st.sidebar.selectbox("Latency histogram", summary["endpoint"].unique().tolist())
+    st.sidebar.bar_chart(REQUEST_LOG.histogram(endpoint), x="latency", y="count")
+
+    st.sidebar.download_button("⬇️ Request log (JSON)", REQUEST_LOG.export("json"), "api_requests.json", "application/json")
+    st.sidebar.download_button("⬇️ Request log (CSV)", REQUEST_LOG.export("csv"), "api_requests.csv", "text/csv")
+    if st.sidebar.button("Reset request log"):
+        REQUEST_LOG.clear()
+
+def sharded_upload_panel(df: pd.DataFrame, run_id: str, name: str, key: str):
+    """Controls for uploading `df` as several `-partNNN` runs, with the manifest and a retry of failed parts."""
+    options = ["Row count"] + [c for c in ("package_id",) if c in df.columns]
+    by = st.selectbox("Shard by", options, key=f"{key}_shard_by")
+    shard_rows = st.number_input("Rows per shard", min_value=1000, value=UPLOAD_SHARD_ROWS, step=1000, key=f"{key}_shard_rows")
+    manifest_key = f"{key}_manifest"
+
+    if st.button("Upload in shards", key=f"{key}_shard_upload"):
+        if run_id and name:
+            with st.spinner("Compressing and uploading shards..."):
+                st.session_state[manifest_key] = upload_sharded(
+                    df, run_id, name, by=None if by == "Row count" else by, shard_rows=int(shard_rows)
+                )
+        else:
+            st.error("Please provide both run ID and dataset name")
+
+    manifest = st.session_state.get(manifest_key)
+    if not manifest:
+        return
+
+    failed = failed_parts(manifest)
+    if failed and st.button(f"Retry {len(failed)} failed part(s)", key=f"{key}_shard_retry"):
+        with st.spinner("Retrying failed shards..."):
+            retry = upload_sharded(
+                df, manifest["run_id"], manifest["run_name"],
+                by=manifest["sharded_by"], shard_rows=manifest["shard_rows"], parts=failed,
+            )
+        if retry:
+            retried = {p["part"]: p for p in retry["parts"]}
+            manifest["parts"] = [retried.get(p["part"], p) for p in manifest["parts"]]
+            write_manifest(manifest)
+    unknown = unknown_parts(manifest)
+    if unknown:
+        st.warning(f"Part(s) {unknown} may already be uploaded; check those runs before uploading them again.")
+
+    parts_df = pd.DataFrame(manifest["parts"])
+    if "keys" in parts_df.columns:
+        parts_df["keys"] = parts_df["keys"].map(lambda keys: ", ".join(map(str, keys)))
+    st.dataframe(parts_df, hide_index=True)
+    st.download_button(
+        "⬇️ Upload manifest (JSON)", json.dumps(manifest, indent=2, default=str),
+        f"{manifest['run_id']}-manifest.json", "application/json", key=f"{key}_shard_manifest",
+    )
+
+
+def cycle_sweep_panel(counts: pd.DataFrame, key: str):
+    """Grid of quality-cycle thresholds vs. how many datasets each pair would flag for rework."""
+    col1, col2 = st.columns(2)
+    qa_spec = col1.text_input("Min QA samples per cycle (start:stop:step or a,b,c)", CYCLE_SWEEP_QA_RANGE, key=f"{key}_qa")
+    pass_spec = col2.text_input("Min pass count per cycle (start:stop:step or a,b,c)", CYCLE_SWEEP_PASS_RANGE, key=f"{key}_pass")
+
+    # A stored sweep is only shown for the counts and thresholds it was run on
+    # (counts has one row per annotator and dataset, so hashing it is cheap)
+    inputs = (int(pd.util.hash_pandas_object(counts, index=False).sum()), qa_spec, pass_spec)
+    stored = st.session_state.get(f"{key}_result")
+    if stored is not None and stored[0] != inputs:
+        del st.session_state[f"{key}_result"]
+
+    if st.button("Run sweep", key=f"{key}_run"):
+        try:
+            qa_values, pass_values = threshold_range(qa_spec), threshold_range(pass_spec)
+        except ValueError:
+            st.error("Thresholds must be integers, e.g. 30:300:30 or 60,90,120")
+            return
+        if not qa_values or not pass_values:
+            st.warning("Both threshold ranges need at least one value.")
+            return
+        st.session_state[f"{key}_result"] = (inputs, sweep_thresholds(counts, qa_values, pass_values))
+
+    stored = st.session_state.get(f"{key}_result")
+    if stored is None or stored[1].empty:
+        return
+    sweep = stored[1]
+
+    st.markdown("**Datasets flagged for rework** (rows: min QA samples, columns: min pass count)")
+    st.dataframe(sweep.pivot(index="min_qa_samples_per_cycle", columns="min_pass_count_per_cycle", values="flagged_datasets"))
+    st.markdown("**Cycles per performance tier**")
+    tier_cols = ["min_qa_samples_per_cycle", "cycles", "incomplete_cycles"] + [f"tier_{t}" for t in range(1, 6)]
+    st.dataframe(sweep[tier_cols].drop_duplicates("min_qa_samples_per_cycle"), hide_index=True)
+    st.download_button(
+        "⬇️ Download sweep (CSV)", sweep.to_csv(index=False), "quality_cycle_sweep.csv", "text/csv", key=f"{key}_csv"
+    )